@@ -0,0 +1,95 @@
+import logging
+from urllib.parse import urlparse
+
+from latency_history import percentile
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class AdaptiveTimeouts:
+    """
+    Per-host request timeouts and retry counts learned from latency history
+
+    The timeout for a host is its p99 latency times a safety factor, clamped
+    between a floor and a ceiling. Attempts that timed out count with the timeout
+    they were given, a lower bound on their real latency, so a host that slows
+    down past its timeout pushes the timeout up instead of failing at it forever. Full page fetch samples are preferred;
+    health probe samples are used only while there are too few fetches. Hosts
+    without enough history get the configured default.
+    """
+    def __init__(self, history, default_timeout=15, floor=3, ceiling=45, safety_factor=2.0,
+                 min_samples=5, default_retries=3, retry_time_budget=60, backoff_factor=1):
+        self.history = history
+        self.default_timeout = default_timeout
+        self.floor = floor
+        self.ceiling = ceiling
+        self.safety_factor = safety_factor
+        self.min_samples = min_samples
+        self.default_retries = default_retries
+        self.retry_time_budget = retry_time_budget
+        self.backoff_factor = backoff_factor
+
+    @classmethod
+    def from_config(cls, history, config, default_timeout=None):
+        """Build from configuration keys, falling back to the built-in defaults"""
+        return cls(
+            history,
+            default_timeout=default_timeout or config.get('fetch_timeout_seconds', 15),
+            floor=config.get('timeout_floor_seconds', 3),
+            ceiling=config.get('timeout_ceiling_seconds', 45),
+            safety_factor=config.get('timeout_safety_factor', 2.0),
+            default_retries=config.get('fetch_retries', 3),
+            retry_time_budget=config.get('retry_time_budget_seconds', 60)
+        )
+
+    def _host_samples(self, host):
+        fetches = self.history.host_samples(host, kind="fetch")
+        if len(fetches) >= self.min_samples:
+            return fetches
+        return self.history.host_samples(host)
+
+    def timeout_for(self, url):
+        """Timeout in seconds for a request to this URL's host"""
+        samples = self._host_samples(urlparse(url).hostname)
+        latencies = [s["latency"] for s in samples
+                     if (s.get("ok") or s.get("error") == "timeout") and s.get("latency") is not None]
+        if len(latencies) < self.min_samples:
+            return self.default_timeout
+        timeout = percentile(latencies, 99) * self.safety_factor
+        return round(min(self.ceiling, max(self.floor, timeout)), 2)
+
+    def retries_for(self, url):
+        """
+        Retry count for this URL's host
+
+        Hosts without enough history keep the default. Otherwise retries are
+        limited so that every attempt plus the doubling backoff the scraper
+        waits between attempts fits inside retry_time_budget, and cut to one
+        when most recent attempts to the host failed, since more retries then
+        rarely help. Each attempt is a separate sample, so failed attempts
+        count towards that failure rate.
+        """
+        samples = self._host_samples(urlparse(url).hostname)
+        if len(samples) < self.min_samples:
+            return self.default_retries
+
+        timeout = self.timeout_for(url)
+        retries = 0
+        spent = timeout
+        while retries < self.default_retries:
+            backoff = self.backoff_factor * (2 ** retries)
+            if spent + backoff + timeout > self.retry_time_budget:
+                break
+            spent += backoff + timeout
+            retries += 1
+
+        # host_samples is time-ordered across every source on the host
+        recent = samples[-10:]
+        failure_rate = sum(1 for s in recent if not s.get("ok")) / len(recent)
+        if failure_rate >= 0.5:
+            retries = min(retries, 1)
+        return retries
+
+    def plan(self, urls):
+        """Timeout and retry count for each URL, for logging and reports"""
+        return {url: {"timeout": self.timeout_for(url), "retries": self.retries_for(url)} for url in urls}
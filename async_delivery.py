@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import SMTP_CONNECTIONS, SMTP_PHASE_SECONDS
+from smtp_connection import SMTPConnectionManager
+
+try:
+    import aiosmtplib
+    AIOSMTPLIB_AVAILABLE = True
+except ImportError:
+    aiosmtplib = None
+    AIOSMTPLIB_AVAILABLE = False
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+if AIOSMTPLIB_AVAILABLE:
+    class _AsyncSMTP(aiosmtplib.SMTP):
+        """aiosmtplib.SMTP that notes when a transaction reaches DATA"""
+        data_started = False
+
+        async def data(self, *args, **kwargs):
+            self.data_started = True
+            return await super().data(*args, **kwargs)
+
+def _as_smtplib_error(error):
+    """
+    The smtplib equivalent of an aiosmtplib exception
+
+    Callers map smtplib exceptions to user-facing messages and decide which
+    failures are permanent, so both transports raise the same types.
+    """
+    if aiosmtplib is None or not isinstance(error, aiosmtplib.SMTPException):
+        return error
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return smtplib.SMTPRecipientsRefused(
+            {refused.recipient: (refused.code, refused.message) for refused in error.recipients})
+    if isinstance(error, aiosmtplib.SMTPAuthenticationError):
+        return smtplib.SMTPAuthenticationError(error.code, error.message)
+    if isinstance(error, (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError)):
+        return smtplib.SMTPServerDisconnected(str(error))
+    if isinstance(error, aiosmtplib.SMTPTimeoutError):
+        return TimeoutError(str(error))
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return smtplib.SMTPResponseException(error.code, error.message)
+    return smtplib.SMTPException(str(error))
+
+class AsyncSMTPSender:
+    """
+    Concurrent sends to one SMTP account from an asyncio event loop
+
+    Up to max_connections authenticated sessions carry messages at the same
+    time; further sends wait for a free session, and idle sessions are reused
+    and closed after idle_seconds. With aiosmtplib installed each session is a
+    native asyncio client, so waiting on the server ties up no thread. Without
+    it each session is an SMTPConnectionManager driven from a pool of
+    max_connections threads. Either way a session dropped before DATA is retried
+    once on a fresh one, and failures raise smtplib exceptions.
+    """
+    def __init__(self, server, port, username, password, max_connections=2, idle_seconds=60, timeout=30,
+                 ssl_context=None):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_connections = max(1, max_connections)
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self._slots = asyncio.Semaphore(self.max_connections)
+        self._idle = []
+        self._reaper = None
+        self._executor = None if AIOSMTPLIB_AVAILABLE else ThreadPoolExecutor(
+            max_workers=self.max_connections, thread_name_prefix="smtp-async")
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config['smtp_server'], config['smtp_port'], config['smtp_username'], config['smtp_password'],
+            max_connections=config.get('smtp_max_connections', 2),
+            idle_seconds=config.get('smtp_idle_seconds', 60),
+            timeout=config.get('smtp_timeout_seconds', 30)
+        )
+
+    async def _open(self):
+        if self._executor is not None:
+            # The manager connects on first send and is closed by the reaper, not its own timer
+            return SMTPConnectionManager(self.server, self.port, self.username, self.password,
+                                         idle_seconds=None, timeout=self.timeout, ssl_context=self.ssl_context)
+        smtp = _AsyncSMTP(hostname=self.server, port=self.port, timeout=self.timeout)
+        try:
+            with SMTP_PHASE_SECONDS.time(phase="connect"):
+                await smtp.connect(start_tls=False)
+            with SMTP_PHASE_SECONDS.time(phase="tls"):
+                await smtp.starttls(tls_context=self.ssl_context)
+            with SMTP_PHASE_SECONDS.time(phase="auth"):
+                await smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        SMTP_CONNECTIONS.inc()
+        logger.debug(f"Opened async SMTP connection to {self.server}:{self.port}")
+        return smtp
+
+    async def _transaction(self, session, msg):
+        if self._executor is not None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, session.send, msg)
+            return
+        session.data_started = False
+        with SMTP_PHASE_SECONDS.time(phase="data"):
+            await session.send_message(msg)
+
+    async def _close_session(self, session):
+        if self._executor is not None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, session.close)
+            return
+        try:
+            await session.quit()
+        except Exception:
+            session.close()
+
+    async def send(self, msg):
+        """
+        Send one message on a free session
+
+        Raises:
+            smtplib.SMTPException: If sending fails on a fresh session too
+        """
+        async with self._slots:
+            session = self._idle.pop()[0] if self._idle else None
+            try:
+                try:
+                    session = session or await self._open()
+                    await self._transaction(session, msg)
+                except Exception as e:
+                    # SMTPConnectionManager already retries a dropped connection itself;
+                    # once DATA has started the server may have the message, so no resend
+                    error = _as_smtplib_error(e)
+                    if (session is None or self._executor is not None or session.data_started
+                            or not isinstance(error, (smtplib.SMTPServerDisconnected, ConnectionError))):
+                        raise
+                    logger.info(f"SMTP connection lost ({error}), reconnecting")
+                    await self._close_session(session)
+                    session = await self._open()
+                    await self._transaction(session, msg)
+            except Exception as e:
+                # A failed transaction can leave the session in an unknown state
+                if session is not None:
+                    await self._close_session(session)
+                error = _as_smtplib_error(e)
+                if error is e:
+                    raise
+                raise error from e
+            if self.idle_seconds:
+                self._idle.append((session, time.monotonic()))
+                self._schedule_reaper()
+            else:
+                await self._close_session(session)
+
+    async def send_many(self, messages):
+        """
+        Send messages concurrently, up to max_connections at a time
+
+        Returns:
+            list: None for each message sent, or the exception it failed with
+        """
+        return await asyncio.gather(*(self.send(msg) for msg in messages), return_exceptions=True)
+
+    def _schedule_reaper(self):
+        if self._reaper is None and self.idle_seconds:
+            self._reaper = asyncio.get_running_loop().call_later(self.idle_seconds, self._reap)
+
+    def _reap(self):
+        """Close sessions that have been idle for idle_seconds"""
+        self._reaper = None
+        cutoff = time.monotonic() - self.idle_seconds
+        expired = [entry for entry in self._idle if entry[1] <= cutoff]
+        self._idle = [entry for entry in self._idle if entry[1] > cutoff]
+        for session, _ in expired:
+            asyncio.ensure_future(self._close_session(session))
+        if self._idle:
+            self._schedule_reaper()
+
+    async def close(self):
+        """Close every idle session"""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        idle, self._idle = self._idle, []
+        for session, _ in idle:
+            await self._close_session(session)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+class DeliveryLoop:
+    """
+    Background thread running the asyncio loop that owns the async senders
+
+    submit() may be called from any thread, including the Qt GUI thread, and
+    returns a concurrent.futures.Future at once; sends for one account share a
+    single AsyncSMTPSender and so its connection limit.
+    """
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._senders = {}
+        self._thread = threading.Thread(target=self._run, name="smtp-delivery-loop", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine):
+        """
+        Run a coroutine on the delivery loop
+
+        Returns:
+            concurrent.futures.Future: Resolves to the coroutine's result or exception
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def sender(self, config):
+        """The sender for the configured account; call from the delivery loop only"""
+        key = (config['smtp_server'], config['smtp_port'], config['smtp_username'], config['smtp_password'],
+               config.get('smtp_max_connections', 2), config.get('smtp_idle_seconds', 60),
+               config.get('smtp_timeout_seconds', 30))
+        sender = self._senders.get(key)
+        if sender is None:
+            sender = self._senders[key] = AsyncSMTPSender.from_config(config)
+        return sender
+
+    async def _close_senders(self):
+        senders, self._senders = list(self._senders.values()), {}
+        for sender in senders:
+            await sender.close()
+
+    def close(self, timeout=10):
+        """Close every sender's sessions and stop the loop"""
+        try:
+            self.submit(self._close_senders()).result(timeout)
+        except Exception as e:
+            logger.warning(f"Closing SMTP sessions failed: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self.loop.close()
+
+_delivery_loop = None
+_delivery_loop_lock = threading.Lock()
+
+def get_delivery_loop():
+    """Return the process-wide delivery loop, starting it on first use"""
+    global _delivery_loop
+    with _delivery_loop_lock:
+        if _delivery_loop is None:
+            _delivery_loop = DeliveryLoop()
+            if not AIOSMTPLIB_AVAILABLE:
+                logger.info("aiosmtplib is not installed - async sends use a small thread pool per account")
+        return _delivery_loop
+
+def close_delivery_loop():
+    """Stop the delivery loop if it was started, e.g. at shutdown"""
+    global _delivery_loop
+    with _delivery_loop_lock:
+        loop, _delivery_loop = _delivery_loop, None
+    if loop is not None:
+        loop.close()
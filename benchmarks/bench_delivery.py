@@ -0,0 +1,111 @@
+"""
+Benchmark digest delivery through email_manager against the local SMTP stand-in
+
+Sends 1 to N digests with email_manager.send_news_email, the same call the
+scheduler and the test-email buttons make, to the stand-in server in
+standin_smtp.py (STARTTLS with a self-signed certificate and AUTH). Each count
+is sent twice: with "smtp_idle_seconds": 0, so every digest opens and closes
+its own connection, and with the default reused connection. Per-digest latency
+percentiles come from timing each call; the connect, TLS, auth and DATA phase
+means come from the gyan_smtp_phase_seconds metric that smtp_connection records.
+test_email_connection is timed once per mode as well.
+
+Usage:
+    python benchmarks/bench_delivery.py --counts 1 10 100 1000 10000 --setup-ms 50 --rtt-ms 2
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from email_manager import send_news_email, test_email_connection
+from metrics import SMTP_PHASE_SECONDS
+from smtp_connection import close_smtp_connections
+from standin_smtp import StandInSMTPServer
+
+USERNAME, PASSWORD = "bench@example.com", "secret"
+PHASES = ("connect", "tls", "auth", "data")
+
+NEWS_ITEMS = [
+    {"source": "PIB", "title": f"Cabinet approves policy framework number {i}", "link": f"https://pib.gov.in/{i}"}
+    for i in range(20)
+]
+
+def phase_totals():
+    """(sum, count) of gyan_smtp_phase_seconds per phase"""
+    totals = {phase: [0.0, 0] for phase in PHASES}
+    for name, key, _, value in SMTP_PHASE_SECONDS.samples():
+        if key[0] not in totals:
+            continue
+        if name.endswith("_sum"):
+            totals[key[0]][0] = value
+        elif name.endswith("_count"):
+            totals[key[0]][1] = value
+    return totals
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run(config, count):
+    close_smtp_connections()
+    before = phase_totals()
+    start = time.perf_counter()
+    check_start = time.perf_counter()
+    result = test_email_connection(config)
+    check = time.perf_counter() - check_start
+    if not result["success"]:
+        raise RuntimeError(result["message"])
+    latencies = []
+    for _ in range(count):
+        send_start = time.perf_counter()
+        send_news_email(config, NEWS_ITEMS)
+        latencies.append(time.perf_counter() - send_start)
+    elapsed = time.perf_counter() - start
+    close_smtp_connections()
+    after = phase_totals()
+    phases = {}
+    for phase in PHASES:
+        calls = after[phase][1] - before[phase][1]
+        phases[phase] = (after[phase][0] - before[phase][0]) / calls * 1000 if calls else 0.0
+    return elapsed, check, latencies, phases
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--setup-ms", type=float, default=50, help="Delay before each new connection's greeting")
+    parser.add_argument("--rtt-ms", type=float, default=2, help="Delay before every command reply")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    server = StandInSMTPServer(credentials=(USERNAME, PASSWORD),
+                               setup_delay=args.setup_ms / 1000, command_delay=args.rtt_ms / 1000)
+    port = server.start()
+    base = {
+        "smtp_server": "127.0.0.1", "smtp_port": port, "smtp_username": USERNAME,
+        "smtp_password": PASSWORD, "email": "reader@example.com"
+    }
+    modes = (("per message", dict(base, smtp_idle_seconds=0)), ("reused", dict(base, smtp_idle_seconds=60)))
+
+    print(f"{args.setup_ms:.0f} ms connection setup, {args.rtt_ms:.0f} ms per reply")
+    print(f"{'digests':>8} {'connection':<12}{'msgs/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'check ms':>10}"
+          + "".join(f"{phase + ' ms':>11}" for phase in PHASES) + f"{'logins':>8}{'KB':>9}")
+    for count in args.counts:
+        for name, config in modes:
+            server.take_counts()
+            elapsed, check, latencies, phases = run(config, count)
+            counts = server.take_counts()
+            print(f"{count:>8} {name:<12}{count / elapsed:>9.1f}{statistics.median(latencies) * 1000:>9.1f}"
+                  f"{percentile(latencies, 0.95) * 1000:>9.1f}{check * 1000:>10.1f}"
+                  + "".join(f"{phases[phase]:>11.1f}" for phase in PHASES)
+                  + f"{counts.get('logins', 0):>8}{counts.get('bytes', 0) / 1024:>9.0f}")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
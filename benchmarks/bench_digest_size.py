@@ -0,0 +1,55 @@
+"""
+Measure digest email size per item for each digest_format
+
+Builds the full MIME message with email_manager.build_news_message for the
+"standard", "compact" and "text" formats at several digest sizes, and reports
+the bytes sent over SMTP, the bytes per item, and the gzip-compressed size as a
+guide to how well each format compresses in transit or storage.
+
+Usage:
+    python benchmarks/bench_digest_size.py --items 10 100 1000
+"""
+import argparse
+import gzip
+import logging
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_manager import DIGEST_FORMATS, build_news_message
+
+SOURCES = ["The Hindu", "PIB", "Indian Express"]
+
+def make_items(count):
+    items = []
+    for i in range(count):
+        item = {"source": SOURCES[i % len(SOURCES)],
+                "title": f"Parliament passes policy on economy & trade, part {i}"}
+        if i % 7:
+            item["link"] = f"https://example.com/news/2024/{i}/parliament-passes-policy-on-economy-and-trade"
+        items.append(item)
+    return items
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    sent_at = datetime.now()
+    print(f"{'items':>6} {'format':<10}{'bytes':>10}{'bytes/item':>12}{'vs standard':>13}{'gzip bytes':>12}")
+    for count in args.items:
+        items = make_items(count)
+        baseline = None
+        for digest_format in DIGEST_FORMATS:
+            config = {"smtp_username": "digest@example.com", "email": "reader@example.com",
+                      "digest_format": digest_format}
+            data = build_news_message(config, items, sent_at).as_bytes()
+            baseline = baseline or len(data)
+            print(f"{count:>6} {digest_format:<10}{len(data):>10}{len(data) / count:>12.0f}"
+                  f"{len(data) / baseline:>12.0%}{len(gzip.compress(data)):>12}")
+
+if __name__ == "__main__":
+    main()
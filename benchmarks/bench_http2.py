@@ -0,0 +1,186 @@
+"""
+Benchmark HTTP/1.1 (requests) against multiplexed HTTP/2 fetching of same-host sources
+
+Starts a local TLS stand-in server that negotiates either h2 or http/1.1 via ALPN
+and sleeps for --setup-ms on every new connection, standing in for the TCP and TLS
+round trips to a remote news site. The same set of same-host pages is then fetched
+concurrently, once through a pooled requests session (one connection per in-flight
+request) and once through http2_transport.Http2Session (one multiplexed connection).
+
+Usage:
+    pip install "httpx[http2]"
+    python benchmarks/bench_http2.py --requests 6 --setup-ms 150 --rounds 5
+"""
+import argparse
+import os
+import socketserver
+import ssl
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import h2.config
+import h2.connection
+import h2.events
+import requests
+import urllib3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http2_transport import Http2Session
+from standin_tls import make_self_signed_cert, server_context
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+PAGE = (b"<html><body>" + b"<h3 class='title'><a href='/news/1'>Parliament passes budget policy</a></h3>" * 400
+        + b"</body></html>")
+
+class StandInHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.server.count_connection()
+        time.sleep(self.server.setup_delay)
+        try:
+            tls = self.server.tls_context.wrap_socket(self.request, server_side=True)
+        except (ssl.SSLError, OSError):
+            return
+        try:
+            if tls.selected_alpn_protocol() == "h2":
+                self.serve_h2(tls)
+            else:
+                self.serve_http1(tls)
+        except (ConnectionError, ssl.SSLError, OSError):
+            pass
+        finally:
+            tls.close()
+
+    def serve_http1(self, sock):
+        buffer = b""
+        while True:
+            while b"\r\n\r\n" not in buffer:
+                data = sock.recv(65536)
+                if not data:
+                    return
+                buffer += data
+            head, buffer = buffer.split(b"\r\n\r\n", 1)
+            method = head.split(b" ", 1)[0]
+            body = b"" if method == b"HEAD" else PAGE
+            sock.sendall(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n"
+                + f"Content-Length: {len(PAGE)}\r\nConnection: keep-alive\r\n\r\n".encode()
+                + body
+            )
+
+    def serve_h2(self, sock):
+        conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        sock.sendall(conn.data_to_send())
+        pending = {}
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                return
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    headers = dict(event.headers)
+                    method = headers.get(b":method", headers.get(":method"))
+                    conn.send_headers(event.stream_id, [
+                        (":status", "200"), ("content-type", "text/html"), ("content-length", str(len(PAGE)))
+                    ], end_stream=method in (b"HEAD", "HEAD"))
+                    if method not in (b"HEAD", "HEAD"):
+                        pending[event.stream_id] = PAGE
+                elif isinstance(event, h2.events.StreamReset):
+                    pending.pop(event.stream_id, None)
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    return
+            for stream_id in list(pending):
+                remaining = pending[stream_id]
+                while remaining:
+                    window = min(conn.local_flow_control_window(stream_id), conn.max_outbound_frame_size)
+                    if window <= 0:
+                        break
+                    chunk, remaining = remaining[:window], remaining[window:]
+                    conn.send_data(stream_id, chunk, end_stream=not remaining)
+                if remaining:
+                    pending[stream_id] = remaining
+                else:
+                    del pending[stream_id]
+            sock.sendall(conn.data_to_send())
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, tls_context, setup_delay):
+        super().__init__(address, StandInHandler)
+        self.tls_context = tls_context
+        self.setup_delay = setup_delay
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def take_connection_count(self):
+        with self._lock:
+            count, self.connections = self.connections, 0
+            return count
+
+def fetch_all(session, urls):
+    def fetch(url):
+        response = session.get(url, timeout=30, stream=True)
+        response.raise_for_status()
+        return len(response.content)
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        return sum(executor.map(fetch, urls))
+
+def run_round(make_session, urls, server):
+    session = make_session()
+    server.take_connection_count()
+    start = time.perf_counter()
+    received = fetch_all(session, urls)
+    elapsed = time.perf_counter() - start
+    session.close()
+    return elapsed, server.take_connection_count(), received
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=6, help="Same-host pages fetched per round")
+    parser.add_argument("--setup-ms", type=float, default=150, help="Simulated connection setup time")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    certfile, keyfile = make_self_signed_cert()
+    server = StandInServer(("127.0.0.1", 0), server_context(certfile, keyfile, ["h2", "http/1.1"]), args.setup_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    urls = [f"https://127.0.0.1:{port}/news/section-{i}/" for i in range(args.requests)]
+
+    def make_requests_session():
+        session = requests.Session()
+        session.verify = False
+        # Keep CA bundle environment variables from re-enabling verification
+        session.trust_env = False
+        return session
+
+    def make_http2_session():
+        return Http2Session(make_requests_session(), retries=0, verify=False)
+
+    print(f"{args.requests} concurrent same-host fetches, {args.setup_ms:.0f} ms connection setup, {args.rounds} rounds")
+    print(f"{'transport':<22}{'median ms':>12}{'connections':>14}{'setup ms':>12}")
+    for name, factory in (("requests (HTTP/1.1)", make_requests_session), ("httpx (HTTP/2)", make_http2_session)):
+        timings, connections = [], []
+        for _ in range(args.rounds):
+            elapsed, opened, _ = run_round(factory, urls, server)
+            timings.append(elapsed)
+            connections.append(opened)
+        opened = statistics.median(connections)
+        print(f"{name:<22}{statistics.median(timings) * 1000:>12.1f}{opened:>14.0f}{opened * args.setup_ms:>12.0f}")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
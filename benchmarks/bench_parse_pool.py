@@ -0,0 +1,86 @@
+"""
+Benchmark parsing fetched pages in threads against a process pool
+
+Builds synthetic front pages in the markup of each configured source and runs
+news_scraper.parse_source_page over all of them, first on a thread pool (the
+default backend, where BeautifulSoup parsing contends for the GIL) and then on
+process pools of 1 to N workers, as enabled by "parse_backend": "process".
+
+Usage:
+    python benchmarks/bench_parse_pool.py --pages 24 --items 1500 --rounds 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_scraper import SOURCES, parse_source_page
+
+KEYWORDS = ["parliament", "policy", "economy", "court", "election"]
+
+ITEM_MARKUP = {
+    "thehindu": "<div class='story-card-news'><h3 class='title'><a href='/news/{i}'>{text}</a></h3><p>{filler}</p></div>",
+    "pib": "<div class='ContentDiv'><a href='/release/{i}'>{text}</a><p>{filler}</p></div>",
+    "indianexpress": "<div class='articles'><div class='title'><a href='/article/{i}'>{text}</a></div><p>{filler}</p></div>",
+}
+
+HEADLINES = [
+    "Parliament passes amended policy on coastal economy",
+    "Monsoon session opens with debate on river linking",
+    "Supreme court reserves verdict on election bonds",
+    "State cabinet approves new industrial corridor",
+]
+
+def make_page(source, items):
+    filler = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4
+    body = "".join(
+        ITEM_MARKUP[source].format(i=i, text=f"{HEADLINES[i % len(HEADLINES)]} {i}", filler=filler)
+        for i in range(items)
+    )
+    return f"<html><head><title>{source}</title></head><body>{body}</body></html>".encode("utf-8")
+
+def run(executor, pages):
+    start = time.perf_counter()
+    futures = [executor.submit(parse_source_page, source, content, KEYWORDS) for source, content in pages]
+    matched = sum(len(future.result()[1]) for future in futures)
+    return time.perf_counter() - start, matched
+
+def measure(make_executor, pages, rounds):
+    with make_executor() as executor:
+        run(executor, pages[:1])  # start workers before timing
+        timings = [run(executor, pages)[0] for _ in range(rounds)]
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=24, help="Source pages parsed per round")
+    parser.add_argument("--items", type=int, default=1500, help="Article blocks per page")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    sources = [source for source in SOURCES if source in ITEM_MARKUP]
+    pages = [(sources[i % len(sources)], make_page(sources[i % len(sources)], args.items)) for i in range(args.pages)]
+    size_kb = sum(len(content) for _, content in pages) / 1024
+    print(f"{args.pages} pages ({size_kb:.0f} KB total), {args.rounds} rounds, {os.cpu_count()} CPUs")
+
+    workers = [1]
+    while workers[-1] * 2 <= args.max_workers:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != args.max_workers:
+        workers.append(args.max_workers)
+
+    baseline = measure(lambda: ThreadPoolExecutor(max_workers=1), pages, args.rounds)
+    print(f"{'backend':<12}{'workers':>8}{'median s':>12}{'speedup':>10}")
+    for name, factory in (("thread", ThreadPoolExecutor), ("process", ProcessPoolExecutor)):
+        for count in workers:
+            elapsed = baseline if (name, count) == ("thread", 1) else measure(
+                lambda: factory(max_workers=count), pages, args.rounds)
+            print(f"{name:<12}{count:>8}{elapsed:>12.2f}{baseline / elapsed:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
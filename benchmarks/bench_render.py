@@ -0,0 +1,184 @@
+"""
+Benchmark digest rendering: string concatenation against digest_renderer
+
+Renders synthetic digests of 100 to 10k items with the original email_manager
+code, which grew the HTML and text bodies with += in two separate passes, and
+with digest_renderer.render_digest, which fills precompiled item templates and
+joins the fragments in one pass. The last column renders through
+render_cache.RenderCache after a digest sharing all but 5% of its articles was
+rendered, so most news-item blocks come from the fragment cache. The message
+columns build the full MIME message with email_manager.build_news_message, first
+with empty caches and then again for the same articles, which reuses it. Reports
+median times and output size.
+
+Usage:
+    python benchmarks/bench_render.py --items 100 1000 10000 --rounds 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from digest_renderer import render_digest
+from email_manager import build_news_message
+from render_cache import RenderCache, render_cache
+
+CONFIG = {"smtp_username": "digest@example.com", "email": "reader@example.com"}
+
+SOURCES = ["The Hindu", "PIB", "Indian Express", "Reuters", "BBC"]
+
+def legacy_render_html(news_items, sent_at=None):
+    """The concatenating renderer that digest_renderer replaced"""
+    sent_at = sent_at or datetime.now()
+    if not news_items:
+        return """
+        <html>
+        <body>
+            <h2>UPSC Daily News Digest</h2>
+            <p>No news items found matching your keywords today.</p>
+            <p><em>This email was sent automatically by UPSC News Aggregator</em></p>
+        </body>
+        </html>
+        """
+    
+    # Group news by source
+    sources = {}
+    for item in news_items:
+        source = item['source']
+        if source not in sources:
+            sources[source] = []
+        sources[source].append(item)
+    
+    html = f"""
+    <html>
+    <head>
+        <style>
+            body {{ font-family: Arial, sans-serif; line-height: 1.6; margin: 20px; }}
+            h2 {{ color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }}
+            h3 {{ color: #34495e; margin-top: 25px; }}
+            .news-item {{ margin: 15px 0; padding: 10px; border-left: 4px solid #3498db; background-color: #f8f9fa; }}
+            .news-title {{ font-weight: bold; margin-bottom: 5px; }}
+            .news-link {{ color: #2980b9; text-decoration: none; }}
+            .news-link:hover {{ text-decoration: underline; }}
+            .footer {{ margin-top: 30px; padding-top: 15px; border-top: 1px solid #bdc3c7; font-size: 12px; color: #7f8c8d; }}
+            .summary {{ background-color: #e8f6f3; padding: 15px; margin-bottom: 20px; border-radius: 5px; }}
+        </style>
+    </head>
+    <body>
+        <h2>UPSC Daily News Digest</h2>
+        <div class="summary">
+            <strong>Summary:</strong> Found {len(news_items)} relevant news items from {len(sources)} sources.
+        </div>
+    """
+    
+    for source, items in sources.items():
+        html += f"""<h3>{source} ({len(items)} items)</h3>"""
+        
+        for item in items:
+            title = item['title']
+            link = item.get('link', '')
+            
+            if link:
+                html += f"""
+                <div class="news-item">
+                    <div class="news-title">
+                        <a href="{link}" class="news-link" target="_blank">{title}</a>
+                    </div>
+                </div>
+                """
+            else:
+                html += f"""
+                <div class="news-item">
+                    <div class="news-title">{title}</div>
+                </div>
+                """
+    
+    html += f"""
+        <div class="footer">
+            <p><em>This email was sent automatically by UPSC News Aggregator on {sent_at.strftime('%d %B %Y at %I:%M %p')}</em></p>
+            <p>If you no longer wish to receive these emails, please update your settings in the application.</p>
+        </div>
+    </body>
+    </html>
+    """
+    
+    return html
+
+def legacy_render_text(news_items, sent_at):
+    """The concatenating plain-text body that digest_renderer replaced"""
+    text_content = f"""
+UPSC Daily News Digest - {sent_at.strftime('%d %B %Y')}
+
+Found {len(news_items)} relevant news items:
+
+"""
+    
+    for item in news_items:
+        text_content += f"• {item['source']}: {item['title']}\n"
+        if item.get('link'):
+            text_content += f"  Link: {item['link']}\n"
+        text_content += "\n"
+    
+    text_content += "\nThis email was sent automatically by UPSC News Aggregator"
+    return text_content
+
+def make_items(count):
+    items = []
+    for i in range(count):
+        item = {"source": SOURCES[i % len(SOURCES)], "title": f"Parliament passes policy on economy & trade, part {i}"}
+        if i % 7:
+            item["link"] = f"https://example.com/news/{i}?ref=digest&id={i}"
+        items.append(item)
+    return items
+
+def median_time(fn, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    sent_at = datetime.now()
+    print(f"{'items':>8}{'legacy ms':>12}{'renderer ms':>14}{'speedup':>10}{'legacy KB':>12}{'renderer KB':>14}{'95% cached ms':>16}"
+          f"{'message ms':>13}{'reused ms':>12}")
+    for count in args.items:
+        items = make_items(count)
+        legacy, (legacy_html, legacy_text) = median_time(
+            lambda: (legacy_render_html(items, sent_at), legacy_render_text(items, sent_at)), args.rounds)
+        compiled, (html, text) = median_time(lambda: render_digest(items, sent_at), args.rounds)
+        legacy_kb = (len(legacy_html) + len(legacy_text)) / 1024
+        compiled_kb = (len(html) + len(text)) / 1024
+
+        def render_changed():
+            cache = RenderCache(max_fragments=count * 2)
+            cache.render(items, sent_at)
+            changed = make_items(count)
+            for i in range(0, count, 20):
+                changed[i] = dict(changed[i], title=changed[i]["title"] + " (updated)")
+            start = time.perf_counter()
+            cache.render(changed, sent_at)
+            return time.perf_counter() - start
+        cached = statistics.median(render_changed() for _ in range(args.rounds))
+
+        def build_message():
+            render_cache.clear()
+            return build_news_message(CONFIG, items, sent_at)
+        message, _ = median_time(build_message, args.rounds)
+        reused, _ = median_time(lambda: build_news_message(CONFIG, items, sent_at), args.rounds)
+        print(f"{count:>8}{legacy * 1000:>12.1f}{compiled * 1000:>14.1f}{legacy / compiled:>9.1f}x"
+              f"{legacy_kb:>12.0f}{compiled_kb:>14.0f}{cached * 1000:>16.1f}"
+              f"{message * 1000:>13.1f}{reused * 1000:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark SMTP delivery with a connection per message against a reused connection
+
+Starts the local SMTP stand-in (STARTTLS and AUTH, see standin_smtp.py), which
+adds --setup-ms to every new connection and --rtt-ms to every command reply to
+stand in for a remote mail server. The same digests are then sent twice: once
+with a new connect/STARTTLS/login/quit per message, as send_news_email used to
+do, and once through one SMTPConnectionManager kept open across the batch.
+
+Usage:
+    python benchmarks/bench_smtp.py --messages 200 --setup-ms 50 --rtt-ms 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from email_manager import build_news_message
+from smtp_connection import SMTPConnectionManager
+from standin_smtp import StandInSMTPServer
+from standin_tls import insecure_client_context
+
+USERNAME, PASSWORD = "bench@example.com", "secret"
+
+NEWS_ITEMS = [
+    {"source": "PIB", "title": f"Cabinet approves policy framework number {i}", "link": f"https://pib.gov.in/{i}"}
+    for i in range(20)
+]
+
+def make_messages(count):
+    config = {"smtp_username": USERNAME, "email": "reader@example.com"}
+    return [build_news_message(config, NEWS_ITEMS) for _ in range(count)]
+
+def manager(port, idle_seconds):
+    return SMTPConnectionManager("127.0.0.1", port, USERNAME, PASSWORD, idle_seconds=idle_seconds,
+                                 ssl_context=insecure_client_context())
+
+def send_per_connection(port, messages):
+    for msg in messages:
+        # idle_seconds=0 quits right after the send, like the old per-message SMTP session
+        manager(port, idle_seconds=0).send(msg)
+
+def send_reused(port, messages):
+    shared = manager(port, idle_seconds=60)
+    errors = [error for error in shared.send_batch(messages) if error is not None]
+    shared.close()
+    if errors:
+        raise errors[0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--setup-ms", type=float, default=50, help="Delay before each new connection's greeting")
+    parser.add_argument("--rtt-ms", type=float, default=5, help="Delay before every command reply")
+    args = parser.parse_args()
+
+    server = StandInSMTPServer(credentials=(USERNAME, PASSWORD),
+                               setup_delay=args.setup_ms / 1000, command_delay=args.rtt_ms / 1000)
+    port = server.start()
+    messages = make_messages(args.messages)
+
+    print(f"{args.messages} digests, {args.setup_ms:.0f} ms connection setup, {args.rtt_ms:.0f} ms per reply")
+    print(f"{'mode':<26}{'seconds':>10}{'msgs/s':>10}{'connections':>13}{'logins':>8}")
+    for name, send in (("connection per message", send_per_connection), ("reused connection", send_reused)):
+        server.take_counts()
+        start = time.perf_counter()
+        send(port, messages)
+        elapsed = time.perf_counter() - start
+        counts = server.take_counts()
+        print(f"{name:<26}{elapsed:>10.2f}{args.messages / elapsed:>10.1f}"
+              f"{counts.get('connections', 0):>13}{counts.get('logins', 0):>8}")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
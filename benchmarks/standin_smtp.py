@@ -0,0 +1,164 @@
+"""
+Local SMTP stand-in server for the delivery benchmarks
+
+Speaks enough ESMTP for smtplib: EHLO/HELO, STARTTLS (with a throwaway
+self-signed certificate), AUTH PLAIN and LOGIN, MAIL, RCPT, DATA, RSET, NOOP and
+QUIT. Like a submission server it refuses MAIL before AUTH. Messages are
+counted and discarded. Each new connection can be delayed to stand in for the
+TCP round trips to a remote mail server, and each command reply can be delayed
+to stand in for the round trip of every SMTP exchange.
+
+Run on its own for manual testing:
+    python benchmarks/standin_smtp.py --port 2525
+"""
+import argparse
+import base64
+import socketserver
+import ssl
+import threading
+import time
+
+from standin_tls import make_self_signed_cert, server_context
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        if self.server.command_delay:
+            time.sleep(self.server.command_delay)
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+        self.wfile.flush()
+
+    def readline(self):
+        line = self.rfile.readline(65536)
+        if not line:
+            raise ConnectionError("client closed the connection")
+        return line.decode("utf-8", "replace").rstrip("\r\n")
+
+    def handle(self):
+        self.server.count("connections")
+        time.sleep(self.server.setup_delay)
+        self.tls = False
+        self.authenticated = False
+        try:
+            self.reply("220 localhost GyAN SMTP stand-in ready")
+            while self.serve_command(self.readline()):
+                pass
+        except (ConnectionError, ssl.SSLError, OSError):
+            pass
+
+    def serve_command(self, line):
+        verb, _, argument = line.partition(" ")
+        verb = verb.upper()
+        if verb in ("EHLO", "HELO"):
+            extensions = ["AUTH PLAIN LOGIN", "8BITMIME", "SIZE 35882577"]
+            if not self.tls:
+                extensions.insert(0, "STARTTLS")
+            if verb == "HELO":
+                self.reply("250 localhost")
+            else:
+                for extension in ["localhost"] + extensions[:-1]:
+                    self.reply(f"250-{extension}")
+                self.reply(f"250 {extensions[-1]}")
+        elif verb == "STARTTLS" and not self.tls:
+            self.reply("220 Ready to start TLS")
+            self.request = self.server.tls_context.wrap_socket(self.request, server_side=True)
+            self.rfile = self.request.makefile("rb")
+            self.wfile = self.request.makefile("wb")
+            self.tls = True
+            self.server.count("tls_handshakes")
+        elif verb == "AUTH":
+            self.authenticate(argument)
+        elif verb == "MAIL" and not self.authenticated:
+            self.reply("530 5.7.0 Authentication required")
+        elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+            self.reply("250 OK")
+        elif verb == "DATA":
+            self.reply("354 End data with <CR><LF>.<CR><LF>")
+            size = 0
+            while True:
+                data = self.readline()
+                if data == ".":
+                    break
+                size += len(data) + 2
+            self.server.count("messages", size)
+            self.reply("250 OK queued")
+        elif verb == "QUIT":
+            self.reply("221 Bye")
+            return False
+        else:
+            self.reply("502 Command not implemented")
+        return True
+
+    def authenticate(self, argument):
+        mechanism, _, initial = argument.partition(" ")
+        mechanism = mechanism.upper()
+        if mechanism == "PLAIN":
+            if not initial:
+                self.reply("334 ")
+                initial = self.readline()
+            _, username, password = base64.b64decode(initial).decode("utf-8").split("\0")
+        elif mechanism == "LOGIN":
+            if initial:
+                username = base64.b64decode(initial).decode("utf-8")
+            else:
+                self.reply("334 VXNlcm5hbWU6")
+                username = base64.b64decode(self.readline()).decode("utf-8")
+            self.reply("334 UGFzc3dvcmQ6")
+            password = base64.b64decode(self.readline()).decode("utf-8")
+        else:
+            self.reply("504 Unrecognized authentication type")
+            return
+        if (username, password) == self.server.credentials:
+            self.authenticated = True
+            self.server.count("logins")
+            self.reply("235 Authentication successful")
+        else:
+            self.reply("535 Authentication credentials invalid")
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    """Threaded stand-in server; counters are read with take_counts()"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=("127.0.0.1", 0), credentials=("bench@example.com", "secret"),
+                 setup_delay=0.0, command_delay=0.0, certfile=None, keyfile=None):
+        super().__init__(address, SMTPHandler)
+        if certfile is None:
+            certfile, keyfile = make_self_signed_cert()
+        self.tls_context = server_context(certfile, keyfile)
+        self.credentials = credentials
+        self.setup_delay = setup_delay
+        self.command_delay = command_delay
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, size=None):
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+            if size is not None:
+                self._counts["bytes"] = self._counts.get("bytes", 0) + size
+
+    def take_counts(self):
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            return counts
+
+    def start(self):
+        """Serve from a daemon thread; returns the bound port"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self.server_address[1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--username", default="bench@example.com")
+    parser.add_argument("--password", default="secret")
+    args = parser.parse_args()
+    server = StandInSMTPServer(("127.0.0.1", args.port), (args.username, args.password))
+    print(f"SMTP stand-in on 127.0.0.1:{args.port} (STARTTLS, AUTH as {args.username})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Self-signed certificates for the local benchmark stand-in servers
+
+Certificates are generated with the openssl command line tool into a temporary
+directory, so no key material is kept in the repository.
+"""
+import os
+import ssl
+import subprocess
+import tempfile
+
+def make_self_signed_cert(directory=None, common_name="localhost"):
+    """
+    Create a throwaway self-signed certificate and key
+
+    Args:
+        directory (str): Where to write the files; a new temp directory by default
+        common_name (str): Certificate subject CN and subjectAltName DNS entry
+
+    Returns:
+        tuple: (certfile, keyfile) paths
+    """
+    directory = directory or tempfile.mkdtemp(prefix="gyan-standin-")
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run([
+        "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+        "-keyout", keyfile, "-out", certfile, "-days", "1",
+        "-subj", f"/CN={common_name}",
+        "-addext", f"subjectAltName=DNS:{common_name},IP:127.0.0.1"
+    ], check=True, capture_output=True)
+    return certfile, keyfile
+
+def server_context(certfile, keyfile, alpn_protocols=None):
+    """TLS context for a stand-in server"""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(certfile, keyfile)
+    if alpn_protocols:
+        context.set_alpn_protocols(alpn_protocols)
+    return context
+
+def insecure_client_context():
+    """Client TLS context that accepts the self-signed stand-in certificate"""
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
@@ -0,0 +1,189 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CIRCUIT_BREAKER_FILE = "circuit_breakers.json"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+class CircuitBreaker:
+    """
+    Per-source circuit breaker
+
+    Closed breakers let every request through. After failure_threshold consecutive
+    failures the breaker opens and requests are skipped until cooldown_seconds have
+    passed; it then goes half-open and lets a single trial request through. A
+    successful trial closes the breaker, a failed one re-opens it; a trial that
+    ends with neither outcome is released so the next run can try again.
+    """
+    def __init__(self, name, failure_threshold=3, cooldown_seconds=1800,
+                 state=CLOSED, failures=0, opened_at=None, trial_started_at=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = state
+        self.failures = failures
+        self.opened_at = opened_at
+        self.trial_started_at = trial_started_at
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Return True if a request may be made now; moves open breakers to half-open after the cooldown"""
+        with self._lock:
+            now = time.time()
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if self.opened_at is not None and now - self.opened_at < self.cooldown_seconds:
+                    return False
+                self.state = HALF_OPEN
+                self.trial_started_at = now
+                logger.info(f"Circuit breaker for {self.name} half-open - sending trial request")
+                return True
+            # Half-open: one trial at a time, unless the previous trial was abandoned
+            if self.trial_started_at is not None and now - self.trial_started_at < self.cooldown_seconds:
+                return False
+            self.trial_started_at = now
+            return True
+
+    @property
+    def is_trial(self):
+        return self.state == HALF_OPEN
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit breaker for {self.name} closed")
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self.trial_started_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"Circuit breaker for {self.name} opened after {self.failures} failures")
+                self.state = OPEN
+                self.opened_at = time.time()
+                self.trial_started_at = None
+
+    def release_trial(self):
+        """Give up a half-open trial that produced no result, e.g. one cut short by the run deadline"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.trial_started_at = None
+
+    def seconds_until_trial(self):
+        """Seconds left in the cooldown of an open breaker, otherwise 0"""
+        if self.state != OPEN or self.opened_at is None:
+            return 0
+        return max(0, self.cooldown_seconds - (time.time() - self.opened_at))
+
+    def trial_eta(self):
+        """Human-readable time until the next trial, never '0 min' while the breaker is open"""
+        seconds = math.ceil(self.seconds_until_trial())
+        if seconds < 60:
+            return f"{seconds}s"
+        return f"{math.ceil(seconds / 60)} min"
+
+    def to_dict(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened_at": self.opened_at,
+            "trial_started_at": self.trial_started_at
+        }
+
+class CircuitBreakerRegistry:
+    """Collection of per-source breakers whose state is persisted between runs"""
+    def __init__(self, path=CIRCUIT_BREAKER_FILE, failure_threshold=3, cooldown_seconds=1800):
+        self.path = path
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load breaker state from disk, ignoring a missing or corrupt file"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load circuit breaker state from {self.path}: {e}")
+            return
+        with self._lock:
+            for name, state in data.items():
+                self._breakers[name] = CircuitBreaker(
+                    name, self.failure_threshold, self.cooldown_seconds,
+                    state=state.get("state", CLOSED),
+                    failures=state.get("failures", 0),
+                    opened_at=state.get("opened_at"),
+                    trial_started_at=state.get("trial_started_at")
+                )
+
+    def save(self):
+        """Write breaker state to disk, atomically so processes sharing the file never read a partial write"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {name: breaker.to_dict() for name, breaker in self._breakers.items()}
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not save circuit breaker state to {self.path}: {e}")
+
+    def get(self, name):
+        """Get or create the breaker for a source"""
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name, self.failure_threshold, self.cooldown_seconds)
+                self._breakers[name] = breaker
+            return breaker
+
+    def states(self):
+        """Current state name per source"""
+        with self._lock:
+            return {name: breaker.state for name, breaker in self._breakers.items()}
+
+def get_breaker_registry(config):
+    """
+    Return the process-wide breaker registry for the configured state file
+
+    Args:
+        config (dict): Configuration; reads circuit_breaker_path,
+            circuit_breaker_failure_threshold and circuit_breaker_cooldown_minutes
+
+    Returns:
+        CircuitBreakerRegistry: Shared registry, so the UI and scheduler see the same state
+    """
+    path = config.get('circuit_breaker_path', CIRCUIT_BREAKER_FILE)
+    with _registries_lock:
+        registry = _registries.get(path)
+        if registry is None:
+            registry = CircuitBreakerRegistry(
+                path,
+                failure_threshold=config.get('circuit_breaker_failure_threshold', 3),
+                cooldown_seconds=config.get('circuit_breaker_cooldown_minutes', 30) * 60
+            )
+            _registries[path] = registry
+        return registry
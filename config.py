@@ -11,6 +11,61 @@ DEFAULT_CONFIG = {
     "smtp_password": "",
     "send_time": "07:00",
     "sources": ["thehindu", "pib", "indianexpress"],
+    "run_report_path": "",
+    "metrics_port": 0,
+    "metrics_host": "127.0.0.1",
+    "source_health_path": "source_health.json",
+    "source_health_interval_minutes": 5,
+    "circuit_breaker_path": "circuit_breakers.json",
+    "circuit_breaker_failure_threshold": 3,
+    "circuit_breaker_cooldown_minutes": 30,
+    "adaptive_timeouts": True,
+    "fetch_timeout_seconds": 15,
+    "timeout_floor_seconds": 3,
+    "timeout_ceiling_seconds": 45,
+    "timeout_safety_factor": 2.0,
+    "fetch_retries": 3,
+    "retry_time_budget_seconds": 60,
+    "max_fetch_workers": 4,
+    "max_requests_per_host": 2,
+    "default_host_rate": 1.0,
+    "host_burst": 2,
+    "host_rate_limits": {},
+    "http2": False,
+    "news_cache_ttl_seconds": 60,
+    "page_cache_ttl_seconds": 30,
+    "parse_backend": "thread",
+    "parse_workers": 0,
+    "max_items_per_source": 10,
+    "run_deadline_seconds": 240,
+    "run_retry_budget": 6,
+    "prefetch_lead_minutes": 15,
+    "poll_interval_minutes": 30,
+    "news_archive_path": "news_archive.db",
+    "archive_retention_days": 30,
+    "run_ledger_path": "scheduler_runs.db",
+    "catchup_max_days": 7,
+    "job_history_path": "job_history.json",
+    "fetch_backend": "local",
+    "work_queue_path": "work_queue.db",
+    "work_lease_seconds": 300,
+    "work_max_attempts": 3,
+    "work_queue_wait_seconds": 600,
+    "smtp_idle_seconds": 60,
+    "smtp_timeout_seconds": 30,
+    "recipients": [],
+    "fanout_workers": 4,
+    "digest_format": "standard",
+    "smtp_async": False,
+    "smtp_max_connections": 2,
+    "delivery_backend": "outbox",
+    "outbox_path": "outbox.db",
+    "outbox_concurrency": 2,
+    "outbox_max_attempts": 8,
+    "outbox_retry_base_seconds": 30,
+    "outbox_retry_max_seconds": 3600,
+    "outbox_poll_seconds": 15,
+    "outbox_retention_days": 30,
     "keywords": [
         "UPSC", "IAS", "IPS", "IFS", "civil services", "government", "policy", "governance",
         "economy", "economic", "GDP", "inflation", "budget", "finance", "banking",
@@ -24,9 +79,10 @@ DEFAULT_CONFIG = {
     ]
 }
 
-def load_config():
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE) as f:
+def load_config(path=None):
+    path = path or CONFIG_FILE
+    if os.path.exists(path):
+        with open(path) as f:
             return json.load(f)
     return DEFAULT_CONFIG
 
@@ -0,0 +1,146 @@
+"""
+Headless entry points for servers: the scheduler daemon and one-shot commands
+
+Nothing here imports PyQt5, so the daily pipeline can run where no display or
+Qt libraries are installed. Run through the gyan package:
+
+    python -m gyan daemon
+    python -m gyan fetch
+    python -m gyan worker --processes 4
+    python -m gyan outbox --requeue
+"""
+import logging
+import multiprocessing
+import signal
+import threading
+
+from config import load_config
+from metrics import start_metrics_from_config
+from news_scraper import fetch_upsc_news
+from scheduler import NewsSchedulerService
+from outbox import get_outbox
+from smtp_connection import close_smtp_connections
+from async_delivery import close_delivery_loop
+from work_queue import run_worker
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+def setup_logging(level=logging.INFO):
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def run_daemon(config_path=None):
+    """
+    Run the news scheduler until SIGINT or SIGTERM
+    
+    SIGHUP re-reads the configuration file and applies it to the running
+    scheduler in place, like saving settings in the desktop app.
+    
+    Args:
+        config_path (str): Configuration file, defaults to config.json
+    """
+    config = load_config(config_path)
+    metrics_server = start_metrics_from_config(config)
+    service = NewsSchedulerService(config).start()
+    stop = _stop_on_signals()
+    
+    def reload_config(signum, frame):
+        try:
+            service.update_config(load_config(config_path))
+            logger.info("Configuration reloaded")
+        except Exception as e:
+            logger.error(f"Configuration reload failed, keeping the current settings: {e}")
+    
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, reload_config)
+    
+    logger.info("GyAN daemon running")
+    # Wait in short slices so signals are handled promptly on every platform
+    while not stop.wait(1):
+        pass
+    
+    service.shutdown()
+    close_smtp_connections()
+    close_delivery_loop()
+    if metrics_server:
+        metrics_server.shutdown()
+    logger.info("GyAN daemon stopped")
+
+def _stop_on_signals():
+    """Event set by SIGINT or SIGTERM"""
+    stop = threading.Event()
+    
+    def request_stop(signum, frame):
+        logger.info(f"Received signal {signum}, shutting down")
+        stop.set()
+    
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    return stop
+
+def _worker_process(config_path):
+    setup_logging()
+    run_worker(load_config(config_path), stop=_stop_on_signals())
+
+def run_workers(config_path=None, processes=1):
+    """
+    Run fetch workers against the shared work queue until SIGINT or SIGTERM
+    
+    Args:
+        config_path (str): Configuration file, defaults to config.json
+        processes (int): Number of worker processes
+    """
+    if processes <= 1:
+        _worker_process(config_path)
+        return
+    
+    workers = [multiprocessing.Process(target=_worker_process, args=(config_path,), name=f"gyan-worker-{i}")
+               for i in range(processes)]
+    for worker in workers:
+        worker.start()
+    stop = _stop_on_signals()
+    while not stop.wait(1):
+        if not any(worker.is_alive() for worker in workers):
+            break
+    for worker in workers:
+        if worker.is_alive():
+            worker.terminate()
+        worker.join()
+
+def run_fetch(config_path=None):
+    """
+    Fetch once and print the matching headlines and the run summary
+    
+    Returns:
+        int: Process exit code
+    """
+    config = load_config(config_path)
+    news_items, report = fetch_upsc_news(config)
+    for item in news_items:
+        print(f"{item['source']}: {item['title']}")
+        if item.get('link'):
+            print(f"  {item['link']}")
+    print(report.summary())
+    return 0
+
+def run_outbox(config_path=None, requeue=False):
+    """
+    Print the outbox counts and its dead messages, optionally requeueing them
+    
+    Args:
+        config_path (str): Configuration file, defaults to config.json
+        requeue (bool): Give every dead message a fresh set of attempts
+    
+    Returns:
+        int: Process exit code, 1 if dead messages were left in place
+    """
+    outbox = get_outbox(load_config(config_path))
+    print(", ".join(f"{state}: {count}" for state, count in sorted(outbox.counts().items())) or "Outbox is empty")
+    dead = outbox.dead_messages()
+    for message in dead:
+        print(f"dead #{message['id']} to {message['recipient']} after {message['attempts']} attempt(s): "
+              f"{message['error']}")
+    if dead and requeue:
+        print(f"Requeued {outbox.requeue_dead()} message(s); a running daemon or app sends them shortly")
+        return 0
+    return 1 if dead else 0
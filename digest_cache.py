@@ -0,0 +1,78 @@
+import logging
+import threading
+from datetime import datetime
+
+from metrics import record_cache_lookup
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class PreparedDigest:
+    """
+    A fetched, deduplicated and rendered digest waiting for its send time
+
+    message is the MIME message, or a list of per-recipient messages from
+    fanout.render_fan_out when recipients are configured.
+    """
+    def __init__(self, send_at, news_items, message):
+        self.send_at = send_at
+        self.news_items = news_items
+        self.message = message
+        self.prepared_at = datetime.now()
+
+class DigestCache:
+    """
+    Holds the digest prepared by the prefetch job for the next send
+
+    The send job takes the entry only if it was prepared for a send time within
+    max_skew_seconds of now, so a digest left over from a missed send is never
+    delivered a day late.
+    """
+    def __init__(self):
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def store(self, digest):
+        with self._lock:
+            self._entry = digest
+
+    def take(self, now=None, max_skew_seconds=600):
+        """
+        Remove and return the prepared digest for a send happening now
+
+        Returns:
+            PreparedDigest: The digest, or None if nothing usable was prepared
+        """
+        now = now or datetime.now()
+        with self._lock:
+            digest, self._entry = self._entry, None
+        usable = digest is not None and abs((now - digest.send_at).total_seconds()) <= max_skew_seconds
+        if digest is not None and not usable:
+            logger.info(f"Discarding digest prepared for {digest.send_at:%Y-%m-%d %H:%M}")
+        record_cache_lookup("digest", usable)
+        return digest if usable else None
+
+    def clear(self):
+        with self._lock:
+            self._entry = None
+
+def article_key(item):
+    """Identity of an article: its link, or its normalised title when it has none"""
+    return item.get('link') or ' '.join(item['title'].lower().split())
+
+def dedup_news_items(news_items):
+    """
+    Drop repeated articles, which appear when several source pages link the same story
+
+    Items are considered the same if they share a link, or have no link and the
+    same title ignoring case and whitespace. The first occurrence is kept.
+    """
+    seen = set()
+    unique = []
+    for item in news_items:
+        key = article_key(item)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(item)
+    return unique
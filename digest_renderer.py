@@ -0,0 +1,175 @@
+"""
+Digest renderer producing the HTML and plain-text email bodies in one pass
+
+The page head with its stylesheet, the empty-digest page and the footer are
+built once at import. Rendering escapes each title and link, fills the per-item
+f-string templates and joins lists of fragments, instead of growing strings with +=.
+"""
+import re
+from datetime import datetime
+from html import escape
+
+TEMPLATE_VERSION = 2
+
+_STYLE = """
+            body { font-family: Arial, sans-serif; line-height: 1.6; margin: 20px; }
+            h2 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }
+            h3 { color: #34495e; margin-top: 25px; }
+            .news-item { margin: 15px 0; padding: 10px; border-left: 4px solid #3498db; background-color: #f8f9fa; }
+            .news-title { font-weight: bold; margin-bottom: 5px; }
+            .news-link { color: #2980b9; text-decoration: none; }
+            .news-link:hover { text-decoration: underline; }
+            .footer { margin-top: 30px; padding-top: 15px; border-top: 1px solid #bdc3c7; font-size: 12px; color: #7f8c8d; }
+            .summary { background-color: #e8f6f3; padding: 15px; margin-bottom: 20px; border-radius: 5px; }
+"""
+
+_HTML_HEAD = f"""
+    <html>
+    <head>
+        <style>{_STYLE}        </style>
+    </head>
+    <body>
+        <h2>UPSC Daily News Digest</h2>
+"""
+
+_HTML_SUMMARY = """        <div class="summary">
+            <strong>Summary:</strong> Found {count} relevant news items from {sources} sources.
+        </div>
+"""
+
+_HTML_SOURCE = "<h3>{source} ({count} items)</h3>\n"
+
+_HTML_FOOTER = """
+        <div class="footer">
+            <p><em>This email was sent automatically by UPSC News Aggregator on {sent}</em></p>
+            <p>If you no longer wish to receive these emails, please update your settings in the application.</p>
+        </div>
+    </body>
+    </html>
+"""
+
+_HTML_EMPTY = """
+        <html>
+        <body>
+            <h2>UPSC Daily News Digest</h2>
+            <p>No news items found matching your keywords today.</p>
+            <p><em>This email was sent automatically by UPSC News Aggregator</em></p>
+        </body>
+        </html>
+"""
+
+_TEXT_HEAD = "\nUPSC Daily News Digest - {date}\n\nFound {count} relevant news items:\n\n"
+_TEXT_FOOTER = "\nThis email was sent automatically by UPSC News Aggregator"
+
+def render_item_html(item):
+    """The news-item block for one article, with its title and link escaped"""
+    title = escape(item['title'], quote=False)
+    link = item.get('link')
+    if link:
+        return (f'<div class="news-item">\n    <div class="news-title">\n'
+                f'        <a href="{escape(link)}" class="news-link" target="_blank">{title}</a>\n'
+                f'    </div>\n</div>\n')
+    return f'<div class="news-item">\n    <div class="news-title">{title}</div>\n</div>\n'
+
+def render_item_text(item):
+    """The plain-text lines for one article"""
+    link = item.get('link')
+    if link:
+        return f"• {item['source']}: {item['title']}\n  Link: {link}\n\n"
+    return f"• {item['source']}: {item['title']}\n\n"
+
+_COMPACT_CLASSES = {'.news-item': '.i', '.news-title': '.t', '.news-link': '.t a', '.footer': '.f', '.summary': '.s'}
+
+def _minify_css(css, renames):
+    """Strip whitespace and the last semicolon of each rule, and shorten class selectors"""
+    css = re.sub(r'\s*([{}:;,])\s*', r'\1', ' '.join(css.split())).replace(';}', '}')
+    for name, short in renames.items():
+        css = css.replace(name, short)
+    return css
+
+# The compact layout puts the minified stylesheet in the head once, with one-letter
+# classes. Items are kept one per line, because 7bit mail bodies cap lines at 998 bytes.
+_COMPACT_HTML_HEAD = (f'<html><head><style>{_minify_css(_STYLE, _COMPACT_CLASSES)}</style></head><body>\n'
+                      '<h2>UPSC Daily News Digest</h2>\n')
+_COMPACT_HTML_SUMMARY = '<p class="s"><b>Summary:</b> Found {count} relevant news items from {sources} sources.</p>\n'
+_COMPACT_HTML_FOOTER = ('<div class="f"><p><em>This email was sent automatically by UPSC News Aggregator on {sent}</em></p>'
+                        '<p>If you no longer wish to receive these emails, please update your settings in the '
+                        'application.</p></div>\n</body></html>\n')
+_COMPACT_HTML_EMPTY = ('<html><body>\n<h2>UPSC Daily News Digest</h2>\n'
+                       '<p>No news items found matching your keywords today.</p>\n'
+                       '<p><em>This email was sent automatically by UPSC News Aggregator</em></p>\n</body></html>\n')
+_COMPACT_TEXT_HEAD = "UPSC Daily News Digest - {date}\nFound {count} relevant news items:\n\n"
+_COMPACT_TEXT_FOOTER = "\nThis email was sent automatically by UPSC News Aggregator\n"
+
+def render_compact_item_html(item):
+    """The compact news-item block for one article"""
+    title = escape(item['title'], quote=False)
+    link = item.get('link')
+    if link:
+        return f'<div class="i"><div class="t"><a href="{escape(link)}">{title}</a></div></div>\n'
+    return f'<div class="i"><div class="t">{title}</div></div>\n'
+
+def render_compact_item_text(item):
+    """The compact plain-text lines for one article, ASCII apart from the title itself"""
+    link = item.get('link')
+    if link:
+        return f"- {item['source']}: {item['title']}\n  {link}\n"
+    return f"- {item['source']}: {item['title']}\n"
+
+class _Layout:
+    def __init__(self, head, summary, footer, empty, text_head, text_footer, item_html, item_text):
+        self.head = head
+        self.summary = summary
+        self.footer = footer
+        self.empty = empty
+        self.text_head = text_head
+        self.text_footer = text_footer
+        self.item_html = item_html
+        self.item_text = item_text
+
+_STANDARD = _Layout(_HTML_HEAD, _HTML_SUMMARY, _HTML_FOOTER, _HTML_EMPTY, _TEXT_HEAD, _TEXT_FOOTER,
+                    render_item_html, render_item_text)
+_COMPACT = _Layout(_COMPACT_HTML_HEAD, _COMPACT_HTML_SUMMARY, _COMPACT_HTML_FOOTER, _COMPACT_HTML_EMPTY,
+                   _COMPACT_TEXT_HEAD, _COMPACT_TEXT_FOOTER, render_compact_item_html, render_compact_item_text)
+
+def render_digest(news_items, sent_at=None, item_html=None, compact=False):
+    """
+    Render the HTML and plain-text bodies of a digest
+
+    Items are grouped by source in the HTML, in order of first appearance, and
+    listed in their original order in the text; both come from a single pass.
+
+    Args:
+        news_items (list): News items
+        sent_at (datetime): Date shown in the text heading and HTML footer, defaults to now
+        item_html (callable): Renders one item's HTML block; lets callers supply cached fragments
+        compact (bool): Use the minified layout with one-letter classes and a terser text body
+
+    Returns:
+        tuple: (html, text)
+    """
+    layout = _COMPACT if compact else _STANDARD
+    item_html = item_html or layout.item_html
+    render_text = layout.item_text
+    sent_at = sent_at or datetime.now()
+    text_parts = [layout.text_head.format(date=sent_at.strftime('%d %B %Y'), count=len(news_items))]
+    if not news_items:
+        text_parts.append(layout.text_footer)
+        return layout.empty, "".join(text_parts)
+
+    by_source = {}
+    add_text = text_parts.append
+    for item in news_items:
+        blocks = by_source.get(item['source'])
+        if blocks is None:
+            blocks = by_source[item['source']] = []
+        blocks.append(item_html(item))
+        add_text(render_text(item))
+    text_parts.append(layout.text_footer)
+
+    html_parts = [layout.head, layout.summary.format(count=len(news_items), sources=len(by_source))]
+    for source, blocks in by_source.items():
+        html_parts.append(_HTML_SOURCE.format(source=escape(source, quote=False), count=len(blocks)))
+        html_parts.extend(blocks)
+    html_parts.append(layout.footer.format(sent=sent_at.strftime('%d %B %Y at %I:%M %p')))
+    return "".join(html_parts), "".join(text_parts)
@@ -1,14 +1,27 @@
 import smtplib
 import logging
+import time
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from email.charset import Charset, QP
 from email.utils import formataddr
 from config import load_config
+from metrics import SMTP_SEND_SECONDS
+from smtp_connection import get_smtp_manager
+from async_delivery import get_delivery_loop
+from render_cache import digest_hash, render_cache
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Compact parts that are mostly ASCII use quoted-printable, which is far smaller
+# than the base64 MIMEText picks for UTF-8; see _text_part
+_QP_UTF8 = Charset('utf-8')
+_QP_UTF8.body_encoding = QP
+
+DIGEST_FORMATS = ("standard", "compact", "text")
+
 def validate_email_config(config):
     """
     Validate email configuration
@@ -35,89 +48,93 @@ def validate_email_config(config):
     if not isinstance(port, int) or not (1 <= port <= 65535):
         raise ValueError(f"Invalid SMTP port: {port}")
 
-def create_email_html(news_items):
+def create_email_html(news_items, sent_at=None):
     """
     Create HTML content for news email
     
     Args:
         news_items (list): List of news items
+        sent_at (datetime): Time shown in the footer, defaults to now
         
     Returns:
         str: HTML content for email
     """
+    html, _ = render_cache.render(news_items, sent_at or datetime.now())
+    return html
+
+def build_news_message(config, news_items, sent_at=None, subject=None):
+    """
+    Render the news digest into a ready-to-send message
+    
+    config['digest_format'] picks the layout: "standard" HTML and text parts,
+    "compact" minified HTML and terser text, or "text" for a plain-text-only
+    message.
+    
+    Args:
+        config (dict): Email configuration
+        news_items (list): List of news items to include
+        sent_at (datetime): Date the digest is for, defaults to now
+        subject (str): Subject line, defaults to the dated daily digest subject
+        
+    Returns:
+        MIMEMultipart: Message with plain text and HTML parts, or a MIMEText for
+            the text format; it may be shared with earlier callers, so it must
+            not be modified
+    """
+    sent_at = sent_at or datetime.now()
+    digest_format = config.get('digest_format', 'standard')
+    if digest_format not in DIGEST_FORMATS:
+        logger.warning(f"Unknown digest_format {digest_format!r} - using standard")
+        digest_format = 'standard'
+    compact = digest_format != 'standard'
+    
+    # Email headers
+    subject = subject or f"Daily UPSC News Digest - {sent_at.strftime('%d %B %Y')}"
     if not news_items:
-        return """
-        <html>
-        <body>
-            <h2>UPSC Daily News Digest</h2>
-            <p>No news items found matching your keywords today.</p>
-            <p><em>This email was sent automatically by UPSC News Aggregator</em></p>
-        </body>
-        </html>
-        """
-    
-    # Group news by source
-    sources = {}
-    for item in news_items:
-        source = item['source']
-        if source not in sources:
-            sources[source] = []
-        sources[source].append(item)
-    
-    html = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; margin: 20px; }}
-            h2 {{ color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }}
-            h3 {{ color: #34495e; margin-top: 25px; }}
-            .news-item {{ margin: 15px 0; padding: 10px; border-left: 4px solid #3498db; background-color: #f8f9fa; }}
-            .news-title {{ font-weight: bold; margin-bottom: 5px; }}
-            .news-link {{ color: #2980b9; text-decoration: none; }}
-            .news-link:hover {{ text-decoration: underline; }}
-            .footer {{ margin-top: 30px; padding-top: 15px; border-top: 1px solid #bdc3c7; font-size: 12px; color: #7f8c8d; }}
-            .summary {{ background-color: #e8f6f3; padding: 15px; margin-bottom: 20px; border-radius: 5px; }}
-        </style>
-    </head>
-    <body>
-        <h2>UPSC Daily News Digest</h2>
-        <div class="summary">
-            <strong>Summary:</strong> Found {len(news_items)} relevant news items from {len(sources)} sources.
-        </div>
-    """
-    
-    for source, items in sources.items():
-        html += f"""<h3>{source} ({len(items)} items)</h3>"""
-        
-        for item in items:
-            title = item['title']
-            link = item.get('link', '')
-            
-            if link:
-                html += f"""
-                <div class="news-item">
-                    <div class="news-title">
-                        <a href="{link}" class="news-link" target="_blank">{title}</a>
-                    </div>
-                </div>
-                """
-            else:
-                html += f"""
-                <div class="news-item">
-                    <div class="news-title">{title}</div>
-                </div>
-                """
-    
-    html += f"""
-        <div class="footer">
-            <p><em>This email was sent automatically by UPSC News Aggregator on {datetime.now().strftime('%d %B %Y at %I:%M %p')}</em></p>
-            <p>If you no longer wish to receive these emails, please update your settings in the application.</p>
-        </div>
-    </body>
-    </html>
+        subject += " (No Items)"
+    sender = formataddr(("UPSC News Aggregator", config['smtp_username']))
+    
+    # Identical content and headers reuse the finished message
+    key = digest_hash(news_items, sent_at, subject, sender, config['email'], digest_format)
+    msg = render_cache.get_message(key)
+    if msg is not None:
+        logger.info(f"Reusing rendered news email with {len(news_items)} items")
+        return msg
+    logger.info(f"Preparing news email with {len(news_items)} items")
+    
+    # Create HTML and plain text versions, reusing cached digests and article blocks
+    html_content, text_content = render_cache.render(news_items, sent_at, compact)
+    
+    # Create email message
+    if digest_format == 'text':
+        msg = _text_part(text_content, 'plain', compact)
+    else:
+        # Plain text first: clients show the last alternative they can render
+        msg = MIMEMultipart('alternative')
+        msg.attach(_text_part(text_content, 'plain', compact))
+        msg.attach(_text_part(html_content, 'html', compact))
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['To'] = config['email']
+    msg['Reply-To'] = config['smtp_username']
+    render_cache.store_message(key, msg)
+    return msg
+
+def _text_part(content, subtype, compact):
     """
+    A MIME text part; compact parts pick the smaller transfer encoding
     
-    return html
+    Quoted-printable triples each non-ASCII byte and base64 adds a third to
+    everything, so quoted-printable wins while under a sixth of the bytes are
+    non-ASCII, as in English digests with the odd symbol or Hindi headline.
+    """
+    if not compact or content.isascii():
+        return MIMEText(content, subtype)
+    data = content.encode('utf-8')
+    non_ascii = len(data) - len(data.decode('ascii', 'ignore'))
+    if non_ascii * 6 < len(data):
+        return MIMEText(content, subtype, _QP_UTF8)
+    return MIMEText(content, subtype, 'utf-8')
 
 def send_news_email(config, news_items):
     """
@@ -133,80 +150,116 @@ def send_news_email(config, news_items):
         Exception: For other unexpected errors
     """
     try:
-        # Validate configuration
         validate_email_config(config)
+    except ValueError as e:
+        logger.error(f"Email configuration error: {e}")
+        raise
+    deliver_message(config, build_news_message(config, news_items))
+
+def deliver_message(config, msg, manager=None):
+    """
+    Send an already built message over SMTP
+    
+    Args:
+        config (dict): Email configuration
+        msg (MIMEMultipart): Message from build_news_message
+        manager (SMTPConnectionManager): Connection to send over, defaults to the
+            shared one for the configured account
         
-        logger.info(f"Preparing to send news email with {len(news_items)} items")
+    Raises:
+        ValueError: If configuration is invalid
+        Exception: If email sending fails, with a user-facing message
+    """
+    try:
+        # Validate configuration
+        validate_email_config(config)
         
-        # Create email message
-        msg = MIMEMultipart('alternative')
+        # Send email
+        logger.info(f"Sending via SMTP server {config['smtp_server']}:{config['smtp_port']}")
         
-        # Email headers
-        subject = f"Daily UPSC News Digest - {datetime.now().strftime('%d %B %Y')}"
-        if not news_items:
-            subject += " (No Items)"
+        send_start = time.perf_counter()
+        try:
+            # Reuses the open authenticated connection when there is one
+            (manager or get_smtp_manager(config)).send(msg)
+        except Exception:
+            SMTP_SEND_SECONDS.observe(time.perf_counter() - send_start, outcome="error")
+            raise
+        SMTP_SEND_SECONDS.observe(time.perf_counter() - send_start, outcome="success")
             
-        msg['Subject'] = subject
-        msg['From'] = formataddr(("UPSC News Aggregator", config['smtp_username']))
-        msg['To'] = config['email']
-        msg['Reply-To'] = config['smtp_username']
-        
-        # Create HTML content
-        html_content = create_email_html(news_items)
+        logger.info(f"News email sent successfully to {config['email']}")
         
-        # Create plain text version
-        text_content = f"""
-UPSC Daily News Digest - {datetime.now().strftime('%d %B %Y')}
-
-Found {len(news_items)} relevant news items:
+    except Exception as e:
+        raise _delivery_error(e)
 
-"""
-        
-        for item in news_items:
-            text_content += f"• {item['source']}: {item['title']}\n"
-            if item.get('link'):
-                text_content += f"  Link: {item['link']}\n"
-            text_content += "\n"
+async def deliver_message_async(config, msg):
+    """
+    Send an already built message from the delivery loop without blocking a thread
+    
+    Sends for one account run concurrently over up to 'smtp_max_connections'
+    sessions. Run it with get_delivery_loop().submit(), or await it on that loop.
+    
+    Raises:
+        ValueError: If configuration is invalid
+        Exception: If email sending fails, with the same messages as deliver_message
+    """
+    try:
+        validate_email_config(config)
         
-        text_content += "\nThis email was sent automatically by UPSC News Aggregator"
+        send_start = time.perf_counter()
+        try:
+            await get_delivery_loop().sender(config).send(msg)
+        except Exception:
+            SMTP_SEND_SECONDS.observe(time.perf_counter() - send_start, outcome="error")
+            raise
+        SMTP_SEND_SECONDS.observe(time.perf_counter() - send_start, outcome="success")
         
-        # Attach both versions
-        msg.attach(MIMEText(text_content, 'plain'))
-        msg.attach(MIMEText(html_content, 'html'))
+        logger.info(f"News email sent successfully to {config['email']}")
         
-        # Send email
-        logger.info(f"Connecting to SMTP server {config['smtp_server']}:{config['smtp_port']}")
+    except Exception as e:
+        raise _delivery_error(e)
+
+def send_news_email_async(config, news_items):
+    """
+    Start sending a news digest email and return at once
+    
+    Args:
+        config (dict): Email configuration
+        news_items (list): List of news items to include
         
-        with smtplib.SMTP(config['smtp_server'], config['smtp_port']) as server:
-            # Enable security
-            server.starttls()
-            
-            # Login
-            server.login(config['smtp_username'], config['smtp_password'])
-            
-            # Send message
-            server.send_message(msg)
-            
-        logger.info(f"News email sent successfully to {config['email']}")
+    Returns:
+        concurrent.futures.Future: Resolves to None when the email is sent, or
+            raises the same errors as send_news_email
         
+    Raises:
+        ValueError: If configuration is invalid
+    """
+    try:
+        validate_email_config(config)
     except ValueError as e:
         logger.error(f"Email configuration error: {e}")
         raise
-    except smtplib.SMTPAuthenticationError as e:
+    msg = build_news_message(config, news_items)
+    return get_delivery_loop().submit(deliver_message_async(config, msg))
+
+def _delivery_error(e):
+    """Log a delivery failure and return the exception to raise, with a user-facing message"""
+    if isinstance(e, ValueError):
+        logger.error(f"Email configuration error: {e}")
+        return e
+    if isinstance(e, smtplib.SMTPAuthenticationError):
         logger.error(f"SMTP authentication failed: {e}")
-        raise Exception("Email authentication failed. Please check your username and password.")
-    except smtplib.SMTPRecipientsRefused as e:
+        return Exception("Email authentication failed. Please check your username and password.")
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
         logger.error(f"SMTP recipients refused: {e}")
-        raise Exception("Email recipient was refused. Please check the email address.")
-    except smtplib.SMTPServerDisconnected as e:
+        return Exception("Email recipient was refused. Please check the email address.")
+    if isinstance(e, smtplib.SMTPServerDisconnected):
         logger.error(f"SMTP server disconnected: {e}")
-        raise Exception("Connection to email server was lost. Please try again.")
-    except smtplib.SMTPException as e:
+        return Exception("Connection to email server was lost. Please try again.")
+    if isinstance(e, smtplib.SMTPException):
         logger.error(f"SMTP error: {e}")
-        raise Exception(f"Failed to send email: {e}")
-    except Exception as e:
-        logger.error(f"Unexpected error sending email: {e}", exc_info=True)
-        raise Exception(f"Unexpected error while sending email: {e}")
+        return Exception(f"Failed to send email: {e}")
+    logger.error(f"Unexpected error sending email: {e}", exc_info=True)
+    return Exception(f"Unexpected error while sending email: {e}")
 
 def test_email_connection(config):
     """
@@ -223,10 +276,8 @@ def test_email_connection(config):
         
         logger.info("Testing email connection...")
         
-        with smtplib.SMTP(config['smtp_server'], config['smtp_port'], timeout=10) as server:
-            server.starttls()
-            server.login(config['smtp_username'], config['smtp_password'])
-            
+        get_smtp_manager(config).check()
+        
         return {
             "success": True,
             "message": "Email configuration test successful"
@@ -0,0 +1,184 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from email_manager import build_news_message, deliver_message, deliver_message_async
+from async_delivery import get_delivery_loop
+from smtp_connection import SMTPConnectionManager
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+def get_recipient_profiles(config):
+    """
+    Recipients with their own keywords and sources
+
+    Entries of config['recipients'] are {"email": ..., "keywords": [...],
+    "sources": [...]}; a missing keywords or sources list falls back to the
+    global one. Without recipients the single config['email'] is the only profile.
+
+    Returns:
+        list: Profile dicts with email, keywords (lower-cased) and sources
+    """
+    recipients = config.get('recipients') or [{"email": config.get('email', '')}]
+    profiles = []
+    for recipient in recipients:
+        if not recipient.get('email'):
+            continue
+        profiles.append({
+            "email": recipient['email'],
+            "keywords": [kw.lower().strip() for kw in recipient.get('keywords') or config.get('keywords', []) if kw.strip()],
+            "sources": list(recipient.get('sources') or config.get('sources', []))
+        })
+    return profiles
+
+def union_config(config, profiles=None):
+    """
+    Configuration that fetches every source and keyword any recipient needs, once
+
+    The per-source item limit is lifted for this fetch: other profiles' matches
+    must not crowd out a profile's own. ProfileMatcher.partition applies the
+    limit to each profile instead.
+
+    Returns:
+        dict: Copy of config with the union of the profiles' sources and keywords
+    """
+    profiles = profiles if profiles is not None else get_recipient_profiles(config)
+    sources, keywords = [], []
+    for profile in profiles:
+        sources.extend(source for source in profile['sources'] if source not in sources)
+        keywords.extend(keyword for keyword in profile['keywords'] if keyword not in keywords)
+    return dict(config, sources=sources or config.get('sources', []), keywords=keywords or config.get('keywords', []),
+                max_items_per_source=0)
+
+class ProfileMatcher:
+    """
+    Matches articles against every recipient profile in one pass
+
+    Each distinct keyword maps to a bitmask of the profiles that want it, and
+    each source to a bitmask of the profiles subscribed to it. An article's mask
+    is the OR of the masks of the keywords in its title, ANDed with its source's
+    mask, so every keyword is tested once per article however many recipients
+    share it.
+    """
+    def __init__(self, profiles):
+        self.profiles = profiles
+        self.keyword_masks = {}
+        self.source_masks = {}
+        for bit, profile in enumerate(profiles):
+            for keyword in profile['keywords']:
+                self.keyword_masks[keyword] = self.keyword_masks.get(keyword, 0) | (1 << bit)
+            for source in profile['sources']:
+                key = source.upper()
+                self.source_masks[key] = self.source_masks.get(key, 0) | (1 << bit)
+
+    def mask(self, item):
+        source_mask = self.source_masks.get(item['source'].upper(), 0)
+        if not source_mask:
+            return 0
+        title = item['title'].lower()
+        mask = 0
+        for keyword, keyword_mask in self.keyword_masks.items():
+            if keyword in title:
+                mask |= keyword_mask
+        return mask & source_mask
+
+    def partition(self, news_items, max_per_source=0):
+        """
+        Args:
+            news_items (list): Items from the union fetch
+            max_per_source (int): Keep at most this many items per source for
+                each profile, as its own fetch would; 0 for no limit
+
+        Returns:
+            list: For each profile, the items it should receive, in input order
+        """
+        per_profile = [[] for _ in self.profiles]
+        per_source = [{} for _ in self.profiles]
+        for item in news_items:
+            mask = self.mask(item)
+            bit = 0
+            while mask:
+                if mask & 1:
+                    counts = per_source[bit]
+                    count = counts.get(item['source'], 0)
+                    if not max_per_source or count < max_per_source:
+                        per_profile[bit].append(item)
+                        counts[item['source']] = count + 1
+                mask >>= 1
+                bit += 1
+        return per_profile
+
+def render_fan_out(config, news_items, sent_at=None, subject=None):
+    """
+    Build one digest per recipient from a single set of fetched items
+
+    Recipients with no matching items get no message.
+
+    Returns:
+        list: (recipient email, MIME message, item count) tuples
+    """
+    profiles = get_recipient_profiles(config)
+    matched = ProfileMatcher(profiles).partition(news_items, config.get('max_items_per_source', 10))
+    messages = []
+    for profile, items in zip(profiles, matched):
+        if not items:
+            logger.info(f"No matching items for {profile['email']} - no digest")
+            continue
+        recipient_config = dict(config, email=profile['email'])
+        messages.append((profile['email'], build_news_message(recipient_config, items, sent_at, subject), len(items)))
+    return messages
+
+def deliver_fan_out(config, messages):
+    """
+    Send per-recipient digests from a pool of 'fanout_workers' threads
+
+    Each worker keeps its own reused SMTP connection, so sends proceed in parallel
+    while each connection still carries many messages. With "smtp_async" the
+    digests go through the asyncio delivery loop instead, over at most
+    'smtp_max_connections' connections and without a thread per send.
+
+    Returns:
+        tuple: (number sent, list of (email, error) for failures)
+    """
+    if config.get('smtp_async', False):
+        return _deliver_fan_out_async(config, messages)
+    workers = max(1, min(config.get('fanout_workers', 4), len(messages)))
+    local = threading.local()
+    managers = []
+    managers_lock = threading.Lock()
+
+    def send(entry):
+        email, msg, _ = entry
+        manager = getattr(local, 'manager', None)
+        if manager is None:
+            manager = local.manager = SMTPConnectionManager.from_config(config)
+            with managers_lock:
+                managers.append(manager)
+        try:
+            deliver_message(dict(config, email=email), msg, manager)
+            return email, None
+        except Exception as e:
+            return email, e
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(send, messages))
+    for manager in managers:
+        manager.close()
+    failures = [(email, error) for email, error in results if error is not None]
+    logger.info(f"Fan-out delivered {len(results) - len(failures)} of {len(messages)} digests")
+    return len(results) - len(failures), failures
+
+def _deliver_fan_out_async(config, messages):
+    """Submit every digest to the delivery loop at once and wait for the results"""
+    loop = get_delivery_loop()
+    futures = [(email, loop.submit(deliver_message_async(dict(config, email=email), msg)))
+               for email, msg, _ in messages]
+    failures = []
+    for email, future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            failures.append((email, e))
+    logger.info(f"Fan-out delivered {len(futures) - len(failures)} of {len(messages)} digests")
+    return len(futures) - len(failures), failures
@@ -0,0 +1 @@
+"""Command line entry points for running GyAN without the desktop UI"""
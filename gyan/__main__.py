@@ -0,0 +1,30 @@
+import argparse
+import sys
+
+from daemon import run_daemon, run_fetch, run_outbox, run_workers, setup_logging
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gyan", description="UPSC News Aggregator without the desktop UI")
+    parser.add_argument("--config", help="Configuration file (default: config.json)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("daemon", help="Run the news scheduler until stopped")
+    commands.add_parser("fetch", help="Fetch once and print matching headlines")
+    worker = commands.add_parser("worker", help="Fetch sources from the shared work queue")
+    worker.add_argument("--processes", type=int, default=1, help="Worker processes to run")
+    outbox = commands.add_parser("outbox", help="Show queued and dead digests in the delivery outbox")
+    outbox.add_argument("--requeue", action="store_true", help="Retry every dead digest")
+    args = parser.parse_args(argv)
+    
+    setup_logging()
+    if args.command == "daemon":
+        run_daemon(args.config)
+        return 0
+    if args.command == "worker":
+        run_workers(args.config, args.processes)
+        return 0
+    if args.command == "outbox":
+        return run_outbox(args.config, args.requeue)
+    return run_fetch(args.config)
+
+if __name__ == "__main__":
+    sys.exit(main())
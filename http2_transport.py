@@ -0,0 +1,120 @@
+import logging
+import threading
+from urllib.parse import urlparse
+
+import requests
+
+try:
+    import httpx
+    import h2  # noqa: F401 - httpx needs the h2 package for HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTP2_AVAILABLE = False
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class Http2Response:
+    """Minimal requests-compatible view of a streamed httpx response"""
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.http_version = response.http_version
+        self._content = None
+
+    @property
+    def content(self):
+        if self._content is None:
+            try:
+                self._content = self._response.read()
+            finally:
+                self._response.close()
+        return self._content
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            self._response.close()
+            raise requests.exceptions.HTTPError(f"{self.status_code} error for url: {self.url}", response=self)
+
+    def close(self):
+        self._response.close()
+
+class Http2Session:
+    """
+    HTTP/2 fetch session that multiplexes all requests to a host over one connection
+
+    Exposes the subset of the requests.Session API used by the scraper (get, head,
+    close) and raises requests exceptions, so callers do not need to know which
+    transport is in use. Hosts that fail HTTP/2 negotiation at the protocol level
+    are remembered and served from the fallback requests session instead.
+    """
+    def __init__(self, fallback, retries=3, headers=None, verify=True):
+        self.fallback = fallback
+        self.headers = dict(headers or fallback.headers)
+        self._client = httpx.Client(
+            http2=True,
+            headers=self.headers,
+            transport=httpx.HTTPTransport(http2=True, retries=retries, verify=verify)
+        )
+        self._http1_hosts = set()
+        self._lock = threading.Lock()
+
+    def _use_fallback(self, url):
+        with self._lock:
+            return urlparse(url).hostname in self._http1_hosts
+
+    def _request(self, method, url, timeout=None, allow_redirects=True, stream=False, headers=None):
+        if self._use_fallback(url):
+            return self.fallback.request(method, url, timeout=timeout, allow_redirects=allow_redirects,
+                                         stream=stream, headers=headers)
+        try:
+            request = self._client.build_request(method, url, timeout=timeout, headers=headers)
+            response = Http2Response(self._client.send(request, stream=True, follow_redirects=allow_redirects))
+            if not stream:
+                response.content
+            return response
+        except (httpx.RemoteProtocolError, httpx.LocalProtocolError) as e:
+            host = urlparse(url).hostname
+            logger.warning(f"HTTP/2 protocol error with {host}, falling back to HTTP/1.1: {e}")
+            with self._lock:
+                self._http1_hosts.add(host)
+            return self.fallback.request(method, url, timeout=timeout, allow_redirects=allow_redirects,
+                                         stream=stream, headers=headers)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(str(e))
+
+    def get(self, url, timeout=None, allow_redirects=True, stream=False, headers=None):
+        return self._request("GET", url, timeout, allow_redirects, stream, headers)
+
+    def head(self, url, timeout=None, allow_redirects=True):
+        return self._request("HEAD", url, timeout, allow_redirects)
+
+    def close(self):
+        self._client.close()
+        self.fallback.close()
+
+def wrap_session(session, config, retries=3):
+    """
+    Return an HTTP/2 session in front of a requests session when enabled and available
+
+    Args:
+        session (requests.Session): The HTTP/1.1 session, used as the fallback
+        config (dict): Configuration; 'http2' turns the transport on
+        retries (int): Connection retries for the HTTP/2 transport
+
+    Returns:
+        Http2Session or requests.Session
+    """
+    if not config.get('http2', False):
+        return session
+    if not HTTP2_AVAILABLE:
+        logger.warning("HTTP/2 requested but httpx[http2] is not installed - using requests")
+        return session
+    return Http2Session(session, retries=retries)
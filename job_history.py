@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from latency_history import percentile
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+JOB_HISTORY_FILE = "job_history.json"
+
+# Outcomes counted as failures in the failure rate
+FAILED_OUTCOMES = ("error",)
+
+class JobRun:
+    """Timing of one job execution, filled in while the job runs"""
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.started = datetime.now()
+        self.stages = {}
+        self.items = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """Time a named stage; repeated stages accumulate"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def to_record(self, outcome):
+        return {
+            "start": self.started.isoformat(timespec='seconds'),
+            "end": datetime.now().isoformat(timespec='seconds'),
+            "duration": round(time.perf_counter() - self._start, 3),
+            "stages": {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            "items": self.items,
+            "outcome": outcome
+        }
+
+class JobRunHistory:
+    """
+    Per-job ring buffer of recent executions, persisted as JSON
+
+    Reads only touch the in-memory buffers, so status displays never wait on disk.
+    """
+    def __init__(self, path=JOB_HISTORY_FILE, max_runs=200):
+        self.path = path
+        self.max_runs = max_runs
+        self._runs = {}
+        self._lock = threading.Lock()
+        # Serialises writers so an older snapshot never replaces a newer one
+        self._save_lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load history from disk, ignoring a missing or corrupt file"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            with self._lock:
+                for job_id, runs in data.items():
+                    self._runs[job_id] = deque(runs, maxlen=self.max_runs)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load job history from {self.path}: {e}")
+
+    def save(self):
+        """Write history to disk, atomically so a reader never sees a partial file"""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with self._save_lock:
+            with self._lock:
+                data = {job_id: list(runs) for job_id, runs in self._runs.items()}
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, separators=(',', ':'))
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.error(f"Could not save job history to {self.path}: {e}")
+
+    def record(self, run, outcome):
+        """Append a finished run and persist the history"""
+        with self._lock:
+            self._runs.setdefault(run.job_id, deque(maxlen=self.max_runs)).append(run.to_record(outcome))
+        self.save()
+
+    def runs(self, job_id):
+        with self._lock:
+            return list(self._runs.get(job_id, ()))
+
+    def stats(self, job_id):
+        """
+        Summarise the recent runs of one job
+
+        Returns:
+            dict: run count, p50/p95/p99 duration in seconds, failure rate and the last run
+        """
+        runs = self.runs(job_id)
+        durations = [run["duration"] for run in runs]
+        failures = sum(1 for run in runs if run["outcome"] in FAILED_OUTCOMES)
+        return {
+            "runs": len(runs),
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "p99": percentile(durations, 99),
+            "failure_rate": failures / len(runs) if runs else 0.0,
+            "last": runs[-1] if runs else None
+        }
+
+    def summary(self):
+        """Stats for every job with history"""
+        with self._lock:
+            job_ids = list(self._runs)
+        return {job_id: self.stats(job_id) for job_id in job_ids}
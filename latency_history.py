@@ -0,0 +1,156 @@
+import json
+import logging
+import math
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from urllib.parse import urlparse
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+HEALTH_HISTORY_FILE = "source_health.json"
+
+_histories = {}
+_histories_lock = threading.Lock()
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of numbers
+
+    Args:
+        values (list): Sample values
+        pct (float): Percentile between 0 and 100
+
+    Returns:
+        float: The percentile value, or None if there are no samples
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[min(rank, len(ordered) - 1)]
+
+class LatencyHistory:
+    """
+    Rolling per-source history of probe and fetch samples, persisted as JSON
+
+    Samples are tagged with a kind: "probe" for health checks and "fetch" for
+    full page downloads made by the scraper.
+    """
+    def __init__(self, path=HEALTH_HISTORY_FILE, max_samples=100):
+        self.path = path
+        self.max_samples = max_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load history from disk, ignoring a missing or corrupt file"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            with self._lock:
+                for source, samples in data.items():
+                    self._samples[source] = deque(samples, maxlen=self.max_samples)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load source health history from {self.path}: {e}")
+
+    def save(self):
+        """Write history to disk, atomically so processes sharing the file never read a partial write"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {source: list(samples) for source, samples in self._samples.items()}
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not save source health history to {self.path}: {e}")
+
+    def record(self, source, url, latency, status_code=None, content_length=0, ok=True, error=None, kind="probe"):
+        """Append one sample for a source"""
+        sample = {
+            "ts": datetime.now().isoformat(timespec='seconds'),
+            "url": url,
+            "kind": kind,
+            "latency": round(latency, 4) if latency is not None else None,
+            "status_code": status_code,
+            "bytes": content_length,
+            "ok": ok,
+            "error": error
+        }
+        with self._lock:
+            self._samples.setdefault(source, deque(maxlen=self.max_samples)).append(sample)
+
+    def samples(self, source):
+        with self._lock:
+            return list(self._samples.get(source, ()))
+
+    def sources(self):
+        with self._lock:
+            return list(self._samples)
+
+    def host_samples(self, host, kind=None):
+        """All samples, across sources, whose URL is on the given host, oldest first"""
+        with self._lock:
+            all_samples = [sample for samples in self._samples.values() for sample in samples]
+        matching = [
+            sample for sample in all_samples
+            if urlparse(sample.get("url", "")).hostname == host and (kind is None or sample.get("kind", "probe") == kind)
+        ]
+        # Each source's samples are in order, but several sources share a host
+        matching.sort(key=lambda sample: sample.get("ts", ""))
+        return matching
+
+    def stats(self, source, kind=None):
+        """
+        Summarise the history of one source
+
+        Probes and page fetches time different things, so callers showing a
+        latency should ask for one kind.
+
+        Args:
+            source (str): Source name
+            kind (str): "probe" or "fetch", or None for every sample
+
+        Returns:
+            dict: sample count, p50/p95 latency in seconds, failure rate and the last sample
+        """
+        samples = [s for s in self.samples(source) if kind is None or s.get("kind", "probe") == kind]
+        latencies = [s["latency"] for s in samples if s["ok"] and s["latency"] is not None]
+        failures = sum(1 for s in samples if not s["ok"])
+        return {
+            "samples": len(samples),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "failure_rate": failures / len(samples) if samples else 0.0,
+            "last": samples[-1] if samples else None
+        }
+
+    def summary(self, kind=None):
+        """Stats of one kind, or of every sample, for every source with history"""
+        return {source: self.stats(source, kind) for source in self.sources()}
+
+def get_latency_history(config):
+    """
+    Return the process-wide latency history for the configured file
+
+    Args:
+        config (dict): Configuration; reads source_health_path
+
+    Returns:
+        LatencyHistory: Shared history, so the prober and scraper never overwrite each other
+    """
+    path = config.get('source_health_path', HEALTH_HISTORY_FILE)
+    with _histories_lock:
+        history = _histories.get(path)
+        if history is None:
+            history = LatencyHistory(path)
+            _histories[path] = history
+        return history
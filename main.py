@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 from PyQt5.QtWidgets import QApplication, QMessageBox
 from PyQt5.QtCore import Qt
 from ui.main_window import MainWindow
@@ -33,4 +34,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Needed for the parse process pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,213 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Counter:
+    """Monotonically increasing counter with optional labels"""
+    type_name = "counter"
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, key, None, value) for key, value in items]
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram:
+    """Cumulative histogram with fixed bucket boundaries"""
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of a block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, dict(series, counts=list(series["counts"]))) for key, series in self._series.items())
+        result = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series["counts"]):
+                result.append((f"{self.name}_bucket", key, ("le", _format_value(bound)), count))
+            result.append((f"{self.name}_sum", key, None, series["sum"]))
+            result.append((f"{self.name}_count", key, None, series["count"]))
+        return result
+
+class MetricsRegistry:
+    """Collection of metrics rendered in the Prometheus text exposition format"""
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, key, extra, value in metric.samples():
+                lines.append(f"{name}{_format_labels(metric.label_names, key, extra)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+SOURCE_FETCH_SECONDS = REGISTRY.register(Histogram(
+    "gyan_source_fetch_seconds", "Time to fetch and process one news source", ["source"]))
+SOURCE_FETCH_BYTES = REGISTRY.register(Counter(
+    "gyan_source_fetch_bytes_total", "Bytes received from news sources", ["source"]))
+SOURCE_FETCHES = REGISTRY.register(Counter(
+    "gyan_source_fetches_total", "News source fetches by outcome", ["source", "status"]))
+KEYWORD_MATCHES = REGISTRY.register(Counter(
+    "gyan_keyword_matches_total", "News items matched per keyword", ["keyword"]))
+NEWS_EMAIL_JOB_SECONDS = REGISTRY.register(Histogram(
+    "gyan_news_email_job_seconds", "Duration of the scheduled news email job", ["outcome"]))
+SMTP_SEND_SECONDS = REGISTRY.register(Histogram(
+    "gyan_smtp_send_seconds", "SMTP delivery latency for one digest", ["outcome"]))
+SMTP_PHASE_SECONDS = REGISTRY.register(Histogram(
+    "gyan_smtp_phase_seconds", "SMTP session phase latency (connect, tls, auth, data)", ["phase"]))
+SMTP_CONNECTIONS = REGISTRY.register(Counter(
+    "gyan_smtp_connections_total", "Authenticated SMTP connections opened"))
+SOURCE_BREAKER_STATE = REGISTRY.register(Gauge(
+    "gyan_source_circuit_state", "Circuit breaker state per source (0 closed, 1 half-open, 2 open)", ["source"]))
+OUTBOX_DELIVERIES = REGISTRY.register(Counter(
+    "gyan_outbox_deliveries_total", "Outbox send attempts by outcome (sent, retry or dead)", ["outcome"]))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "gyan_cache_requests_total", "Cache lookups by cache and result (hit or miss)", ["cache", "result"]))
+
+_BREAKER_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+def record_scrape_report(report):
+    """Publish per-source latency, byte and outcome counters from a ScrapeRunReport"""
+    for timing in report.sources.values():
+        total = timing.network_seconds + timing.processing_seconds
+        SOURCE_FETCH_SECONDS.observe(total, source=timing.source)
+        SOURCE_FETCH_BYTES.inc(timing.bytes_received, source=timing.source)
+        SOURCE_FETCHES.inc(source=timing.source, status=timing.status)
+        if timing.breaker_state:
+            SOURCE_BREAKER_STATE.set(_BREAKER_STATE_VALUES.get(timing.breaker_state, 0), source=timing.source)
+
+def record_cache_lookup(cache, hit):
+    """Count a cache lookup so hit rates can be derived"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Metrics request: {format % args}")
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """
+    Serve the metrics registry over HTTP from a daemon thread
+
+    Args:
+        port (int): TCP port to listen on
+        host (str): Interface to bind; defaults to localhost only
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{server.server_port}/metrics")
+    return server
+
+def start_metrics_from_config(config):
+    """Start the metrics endpoint if 'metrics_port' is configured, otherwise return None"""
+    port = config.get('metrics_port', 0)
+    if not port:
+        return None
+    try:
+        return start_metrics_server(int(port), config.get('metrics_host', '127.0.0.1'))
+    except OSError as e:
+        logger.error(f"Failed to start metrics endpoint on port {port}: {e}")
+        return None
@@ -0,0 +1,129 @@
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+
+from digest_cache import article_key
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+NEWS_ARCHIVE_FILE = "news_archive.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT,
+    category TEXT,
+    first_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_first_seen ON articles (first_seen);
+CREATE TABLE IF NOT EXISTS validators (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    checked_at REAL NOT NULL
+);
+"""
+
+class NewsArchive:
+    """
+    SQLite archive of every matching article seen by the intraday poller
+
+    Articles are stored once, keyed like dedup_news_items, with the time they
+    were first seen. The ETag and Last-Modified validators of each source page are
+    kept alongside so the next poll can make conditional requests.
+    """
+    def __init__(self, path=NEWS_ARCHIVE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._lock, closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def ingest(self, news_items, seen_at=None):
+        """
+        Store articles not already in the archive
+
+        Returns:
+            int: Number of new articles
+        """
+        seen_at = seen_at or time.time()
+        rows = [(article_key(item), item['source'], item['title'], item.get('link', ''),
+                 item.get('category', 'general'), seen_at) for item in news_items]
+        with self._lock, closing(self._connect()) as conn, conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO articles (key, source, title, link, category, first_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            return conn.total_changes - before
+
+    def recent(self, hours=24, now=None, newest_first=False):
+        """
+        Articles first seen in the last `hours`, oldest first, as news item dicts
+
+        With newest_first the latest poll's articles come first, each poll's
+        still in page order.
+        """
+        since = (now or time.time()) - hours * 3600
+        order = "first_seen DESC, rowid" if newest_first else "first_seen, rowid"
+        with self._lock, closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT source, title, link, category, first_seen FROM articles "
+                f"WHERE first_seen >= ? ORDER BY {order}", (since,)
+            ).fetchall()
+        return [{
+            "source": source,
+            "title": title,
+            "link": link,
+            "date": datetime.fromtimestamp(first_seen).strftime("%Y-%m-%d"),
+            "category": category
+        } for source, title, link, category, first_seen in rows]
+
+    def prune(self, days=30):
+        """Delete articles older than `days`; returns how many were removed"""
+        with self._lock, closing(self._connect()) as conn, conn:
+            cursor = conn.execute("DELETE FROM articles WHERE first_seen < ?", (time.time() - days * 86400,))
+            return cursor.rowcount
+
+    def validators(self):
+        """Stored validators as {url: {"etag": ..., "last_modified": ...}}"""
+        with self._lock, closing(self._connect()) as conn:
+            rows = conn.execute("SELECT url, etag, last_modified FROM validators").fetchall()
+        return {url: {"etag": etag, "last_modified": last_modified} for url, etag, last_modified in rows}
+
+    def save_validators(self, validators):
+        now = time.time()
+        rows = [(url, v.get("etag"), v.get("last_modified"), now) for url, v in validators.items()]
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO validators (url, etag, last_modified, checked_at) VALUES (?, ?, ?, ?)", rows
+            )
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+def get_news_archive(config):
+    """
+    Return the process-wide news archive for the configured database
+
+    Args:
+        config (dict): Configuration; reads news_archive_path
+
+    Returns:
+        NewsArchive: Shared archive, so the poll and digest jobs use one lock
+    """
+    path = config.get('news_archive_path', NEWS_ARCHIVE_FILE)
+    with _archives_lock:
+        archive = _archives.get(path)
+        if archive is None:
+            archive = NewsArchive(path)
+            _archives[path] = archive
+        return archive
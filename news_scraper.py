@@ -7,6 +7,24 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
 import random
+import socket
+import time
+import json
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from email.utils import parsedate_to_datetime
+from run_report import ScrapeRunReport, SourceTiming, set_last_report, write_report_jsonl
+from metrics import KEYWORD_MATCHES, record_scrape_report
+from circuit_breaker import get_breaker_registry
+from latency_history import get_latency_history
+from adaptive_timeouts import AdaptiveTimeouts
+from rate_limiter import get_rate_limiter, get_politeness_scheduler
+from http2_transport import wrap_session
+from singleflight import SingleFlight, FlightTimeout
+from run_budget import RunBudget, DeadlineExceeded
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -78,6 +96,14 @@ GEOGRAPHIC_SOURCES = {
     }
 }
 
+# Concurrent fetches of the same page, and of the same whole run, share one request
+_page_flight = SingleFlight("page_fetch")
+_run_flight = SingleFlight("news_run")
+
+# Worker processes for parsing, by worker count; see get_parse_pool
+_parse_pools = {}
+_parse_pools_lock = threading.Lock()
+
 # UPSC question templates
 UPSC_QUESTION_TEMPLATES = [
     "Analyze the implications of {} in the context of Indian governance.",
@@ -92,18 +118,32 @@ UPSC_QUESTION_TEMPLATES = [
     "Evaluate the effectiveness of current initiatives related to {}."
 ]
 
-def create_session():
-    """Create a requests session with retry strategy"""
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+RETRY_BACKOFF_FACTOR = 1
+# Longest pause a 429 Retry-After can put on a host when runs have no deadline
+MAX_RATE_LIMIT_PENALTY = 600
+
+def create_session(retries=3):
+    """
+    Create a requests session with retry strategy
+    
+    Args:
+        retries (int): urllib3 retry count, or None to disable urllib3 retries
+            entirely and return error responses to the caller, which then
+            retries under a run-level budget
+    """
     session = requests.Session()
     
     # Define retry strategy
-    retry_strategy = Retry(
-        total=3,
-        backoff_factor=1,
-        status_forcelist=[429, 500, 502, 503, 504],
-    )
-    
-    adapter = HTTPAdapter(max_retries=retry_strategy)
+    if retries is None:
+        adapter = HTTPAdapter()
+    else:
+        retry_strategy = Retry(
+            total=retries,
+            backoff_factor=RETRY_BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUSES,
+        )
+        adapter = HTTPAdapter(max_retries=retry_strategy)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     
@@ -114,6 +154,14 @@ def create_session():
     
     return session
 
+def get_all_source_urls():
+    """Return a mapping of every SOURCES and GEOGRAPHIC_SOURCES name to its URL"""
+    urls = {name: source_config["url"] for name, source_config in SOURCES.items()}
+    for region_sources in GEOGRAPHIC_SOURCES.values():
+        for name, source_config in region_sources.items():
+            urls[name] = source_config["url"]
+    return urls
+
 def validate_config(config):
     """Validate configuration for news scraping"""
     if not config:
@@ -130,6 +178,102 @@ def validate_config(config):
     if invalid_sources:
         logger.warning(f"Invalid sources configured: {invalid_sources}")
 
+def get_parse_pool(config):
+    """
+    Return the shared process pool for parsing, or None to parse in the fetching thread
+    
+    Args:
+        config (dict): Configuration; 'parse_backend' is "thread" (default) or
+            "process", and 'parse_workers' the pool size (0 for one per CPU)
+    
+    Returns:
+        ProcessPoolExecutor or None
+    """
+    if config.get('parse_backend', 'thread') != 'process':
+        return None
+    workers = config.get('parse_workers', 0) or os.cpu_count() or 1
+    with _parse_pools_lock:
+        pool = _parse_pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            _parse_pools[workers] = pool
+            logger.info(f"Started parse process pool with {workers} workers")
+        return pool
+
+def parse_source_page(source, content, keywords, max_matches=10):
+    """
+    Parse a fetched page and select the items matching the keywords
+    
+    Runs unchanged in the fetching thread or in a worker process. The source is
+    looked up by name, because the SOURCES callables are lambdas that cannot be
+    pickled. Results are compact tuples rather than BeautifulSoup objects.
+    
+    Args:
+        source (str): Key into SOURCES
+        content (bytes): Page body
+        keywords (list): Lower-cased keywords
+        max_matches (int): Stop after this many matching items; 0 for no limit
+    
+    Returns:
+        tuple: (number of items selected, list of (title, link, matched keywords)
+            records, dict of stage name to seconds)
+    """
+    source_config = SOURCES[source]
+    timing = SourceTiming(source, source_config["url"])
+    records = []
+    
+    with timing.stage("parse"):
+        soup = BeautifulSoup(content, 'html.parser')
+    with timing.stage("select"):
+        items = source_config["parser"](soup)
+    
+    for item in items[:20]:  # Process top 20 items
+        try:
+            with timing.stage("filter"):
+                text = source_config["processor"](item)
+                
+                if not text or len(text.strip()) < 10:
+                    continue
+                
+                # Check if any keyword matches
+                text_lower = text.lower()
+                matched = [kw for kw in keywords if kw in text_lower]
+            
+            if matched:
+                # Extract link
+                link = ""
+                try:
+                    with timing.stage("link_extraction"):
+                        link = source_config["link_extractor"](item, source_config["url"])
+                except Exception as link_error:
+                    logger.debug(f"Failed to extract link from {source}: {link_error}")
+                
+                records.append((text[:500], link, matched))  # Limit title length
+                
+                if max_matches and len(records) >= max_matches:  # Limit per source
+                    break
+                    
+        except Exception as item_error:
+            logger.debug(f"Error processing item from {source}: {item_error}")
+            continue
+    
+    return len(items), records, timing.stages
+
+def _parse_page(source, content, keywords, parse_pool, max_matches=10):
+    """Run parse_source_page in the pool if there is one, else in this thread"""
+    if parse_pool is not None:
+        try:
+            return parse_pool.submit(parse_source_page, source, content, keywords, max_matches).result()
+        except BrokenProcessPool as e:
+            logger.error(f"Parse process pool failed, parsing {source} in-process: {e}")
+    return parse_source_page(source, content, keywords, max_matches)
+
+def _resolve_host(url):
+    """Resolve the host of a URL so DNS time can be reported separately"""
+    host = urlparse(url).hostname
+    if host:
+        socket.getaddrinfo(host, 443)
+
 def get_upsc_news(config):
     """
     Fetch UPSC-relevant news from configured sources
@@ -144,6 +288,73 @@ def get_upsc_news(config):
         ValueError: If configuration is invalid
         requests.RequestException: If network requests fail
     """
+    news_items, _ = fetch_upsc_news(config)
+    return news_items
+
+def _config_key(config):
+    """Stable hash of a configuration, used to coalesce identical runs"""
+    return hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def fetch_upsc_news(config):
+    """
+    Fetch UPSC-relevant news and a per-source, per-stage timing report
+    
+    Calls with an identical configuration that overlap (the UI fetch button, the
+    scheduled job) share a single run, and its result is reused for
+    'news_cache_ttl_seconds' (default 60) afterwards. A call joining a run in
+    flight waits no longer than its own 'run_deadline_seconds'.
+    
+    Args:
+        config (dict): Configuration containing sources, keywords, etc.
+            If 'run_report_path' is set the report is appended there as JSONL.
+        
+    Returns:
+        tuple: (list of news items, ScrapeRunReport)
+        
+    Raises:
+        ValueError: If configuration is invalid
+        DeadlineExceeded: If the shared run did not finish within this call's deadline
+    """
+    try:
+        (news_items, report), shared = _run_flight.do(
+            _config_key(config),
+            lambda: _fetch_upsc_news(config),
+            ttl=config.get('news_cache_ttl_seconds', 60),
+            timeout=config.get('run_deadline_seconds', 240) or None
+        )
+    except FlightTimeout as e:
+        logger.error(f"Gave up waiting for the news fetch already in progress: {e}")
+        raise DeadlineExceeded("Run deadline reached waiting for a shared fetch") from e
+    if shared:
+        logger.info(f"Reusing in-flight or recent news fetch ({len(news_items)} items)")
+    # Callers get their own item dicts so one cannot modify another's results
+    return [dict(item) for item in news_items], report
+
+def poll_upsc_news(config, validators):
+    """
+    Fetch only source pages that changed since the last poll
+    
+    Each page is requested with If-None-Match / If-Modified-Since from its stored
+    validators; pages answering 304 Not Modified are skipped without parsing.
+    
+    Args:
+        config (dict): Configuration containing sources, keywords, etc.
+        validators (dict): {url: {"etag": ..., "last_modified": ...}} from the last poll
+        
+    Returns:
+        tuple: (list of news items, ScrapeRunReport, updated validators dict)
+    """
+    news_items, report = _fetch_upsc_news(config, validators=validators)
+    updated = dict(validators)
+    for timing in report.sources.values():
+        if timing.status in ("ok", "empty") and (timing.etag or timing.last_modified):
+            updated[timing.url] = {"etag": timing.etag, "last_modified": timing.last_modified}
+    not_modified = sum(1 for timing in report.sources.values() if timing.status == "not_modified")
+    logger.info(f"Poll: {len(news_items)} items, {not_modified} pages not modified")
+    return news_items, report, updated
+
+def _fetch_upsc_news(config, validators=None):
+    """Run the scraping pipeline once; see fetch_upsc_news and poll_upsc_news"""
     try:
         validate_config(config)
     except ValueError as e:
@@ -151,90 +362,302 @@ def get_upsc_news(config):
         raise
     
     news_items = []
+    report = ScrapeRunReport()
     keywords = [kw.lower().strip() for kw in config['keywords'] if kw.strip()]
     
     if not keywords:
         logger.warning("No valid keywords found after processing")
-        return news_items
+        report.finish()
+        return news_items, report
     
-    session = create_session()
+    history = get_latency_history(config)
+    timeouts = AdaptiveTimeouts.from_config(history, config)
+    budget = RunBudget.from_config(config)
+    report.budget = budget
+    # Retries are made by _scrape_source against the run budget, not by urllib3
+    session = wrap_session(create_session(retries=None), config, retries=0)
+    breakers = get_breaker_registry(config)
+    limiter = get_rate_limiter(config)
+    parse_pool = get_parse_pool(config)
+    max_matches = config.get('max_items_per_source', 10)
     
+    tasks = []
     for source in config['sources']:
         if source not in SOURCES:
             logger.warning(f"Skipping unknown source: {source}")
             continue
             
         source_config = SOURCES[source]
-        logger.info(f"Scraping news from {source}")
+        timing = report.source(source, source_config["url"])
+        breaker = breakers.get(source)
+        
+        if not breaker.allow_request():
+            timing.status = "skipped"
+            timing.error = f"circuit open, next trial in {breaker.trial_eta()}"
+            timing.breaker_state = breaker.state
+            logger.warning(f"Skipping {source} - circuit breaker is open")
+            continue
+        
+        # A half-open breaker gets exactly one trial request, without retries
+        if config.get('adaptive_timeouts', True):
+            timing.timeout = timeouts.timeout_for(source_config["url"])
+            timing.retries = 0 if breaker.is_trial else timeouts.retries_for(source_config["url"])
+        else:
+            timing.timeout = config.get('fetch_timeout_seconds', 15)
+            timing.retries = 0 if breaker.is_trial else 3
+        
+        timing.page_cache_ttl = config.get('page_cache_ttl_seconds', 30)
+        
+        def task(waited, source=source, source_config=source_config, timing=timing, breaker=breaker):
+            if waited is None:
+                # The host's rate limit (e.g. a long Retry-After) would hold the run past its deadline
+                budget.deadline_hit = True
+                timing.status, timing.error = "deadline", "run deadline reached waiting for the host's rate limit"
+                if breaker.is_trial:
+                    breaker.release_trial()
+                timing.breaker_state = breaker.state
+                logger.warning(f"Skipping {source} - its host is rate limited past the run deadline")
+                return []
+            timing.add_stage_time("rate_wait", waited)
+            return _scrape_source(source, source_config, timing, session, keywords, history, breaker, limiter, budget,
+                                  validators=None if validators is None else validators.get(source_config["url"], {}),
+                                  parse_pool=parse_pool, max_matches=max_matches)
+        tasks.append((source_config["url"], task))
+    
+    # Sources are fetched concurrently, paced per host; results keep the configured order
+    try:
+        for source_items in get_politeness_scheduler(config).run(tasks, max_wait=budget.wait_allowance):
+            news_items.extend(source_items)
+    finally:
+        # Each run opens its own connection pool (an httpx client with HTTP/2); release its sockets
+        session.close()
+    
+    breakers.save()
+    history.save()
+    report.finish()
+    set_last_report(report)
+    record_scrape_report(report)
+    if config.get('run_report_path'):
+        write_report_jsonl(report, config['run_report_path'])
+    
+    logger.info(f"Total news items found: {len(news_items)}")
+    logger.info(f"Scrape run: {report.summary()}")
+    if budget.deadline_hit:
+        logger.warning(f"Run deadline reached - returning partial results ({len(news_items)} items)")
+    return news_items, report
+
+def _scrape_source(source, source_config, timing, http, keywords, history, breaker, limiter, budget, validators=None,
+                   parse_pool=None, max_matches=10):
+    """
+    Fetch, parse and filter a single source, recording timings on `timing`
+    
+    With validators ({"etag": ..., "last_modified": ...}) the request is
+    conditional, and a 304 Not Modified response ends the source with status
+    "not_modified" and no items. Parsing and filtering run in parse_pool when
+    one is given, keeping at most max_matches items (0 for no limit).
+    
+    Failed requests (timeouts, connection errors and RETRY_STATUSES) are retried
+    up to timing.retries times, each retry drawn from the run's shared budget,
+    honouring Retry-After and only while the backoff plus another attempt still
+    fits before the run deadline.
+    
+    Returns:
+        list: News items from this source matching the keywords
+    """
+    news_items = []
+    logger.info(f"Scraping news from {source} (timeout {timing.timeout}s, {timing.retries} retries)")
+    trial = breaker.is_trial
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    
+    def download():
+        try:
+            with timing.stage("dns"):
+                _resolve_host(source_config["url"])
+        except socket.gaierror as dns_error:
+            logger.debug(f"DNS lookup failed for {source}: {dns_error}")
         
+        # Fetch the webpage; headers arrive first, the body is streamed
+        timing.attempts += 1
+        attempt_start = time.perf_counter()
         try:
-            # Fetch the webpage
-            response = session.get(
-                source_config["url"], 
-                timeout=15,
-                allow_redirects=True
-            )
+            with timing.stage("connect"):
+                response = http.get(
+                    source_config["url"], 
+                    timeout=budget.clamp_timeout(timing.timeout),
+                    allow_redirects=True,
+                    stream=True,
+                    headers=headers or None
+                )
+            timing.status_code = response.status_code
             response.raise_for_status()
             
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            items = source_config["parser"](soup)
-            
-            if not items:
-                logger.warning(f"No items found from {source} - selectors may need updating")
-                continue
-            
-            items_processed = 0
-            for item in items[:20]:  # Process top 20 items
-                try:
-                    text = source_config["processor"](item)
-                    
-                    if not text or len(text.strip()) < 10:
-                        continue
-                    
-                    # Check if any keyword matches
-                    text_lower = text.lower()
-                    if any(kw in text_lower for kw in keywords):
-                        # Extract link
-                        link = ""
-                        try:
-                            link = source_config["link_extractor"](item, source_config["url"])
-                        except Exception as link_error:
-                            logger.debug(f"Failed to extract link from {source}: {link_error}")
-                        
-                        news_item = {
-                            "source": source.upper(),
-                            "title": text[:500],  # Limit title length
-                            "link": link,
-                            "date": datetime.now().strftime("%Y-%m-%d"),
-                            "category": "general"
-                        }
-                        news_items.append(news_item)
-                        items_processed += 1
-                        
-                        if items_processed >= 10:  # Limit per source
-                            break
-                            
-                except Exception as item_error:
-                    logger.debug(f"Error processing item from {source}: {item_error}")
-                    continue
-            
-            logger.info(f"Successfully processed {items_processed} items from {source}")
-            
-        except requests.exceptions.Timeout:
-            logger.error(f"Timeout while fetching from {source}")
-        except requests.exceptions.ConnectionError:
-            logger.error(f"Connection error while fetching from {source}")
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP error {e.response.status_code} while fetching from {source}")
+            with timing.stage("download"):
+                content = response.content
         except requests.exceptions.RequestException as e:
-            logger.error(f"Request error while fetching from {source}: {e}")
-        except Exception as e:
-            logger.error(f"Unexpected error scraping {source}: {e}")
+            # Every attempt is its own latency sample, so a timed-out attempt never
+            # inflates the latency of the retry that succeeded after it
+            history.record(source, source_config["url"], time.perf_counter() - attempt_start,
+                           getattr(e.response, "status_code", None), 0, ok=False,
+                           error=_request_error_label(e), kind="fetch")
+            raise
+        # A 304 carries no page, so its latency says nothing about a full fetch's
+        if response.status_code != 304:
+            history.record(source, source_config["url"], time.perf_counter() - attempt_start,
+                           response.status_code, len(content), ok=True, kind="fetch")
+        return response.status_code, content, response.headers.get("ETag"), response.headers.get("Last-Modified")
+    
+    def fetch_page():
+        attempt = 0
+        while True:
+            try:
+                return download()
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+                    requests.exceptions.HTTPError) as e:
+                response = getattr(e, 'response', None)
+                if isinstance(e, requests.exceptions.HTTPError) and response.status_code not in RETRY_STATUSES:
+                    raise
+                if attempt >= timing.retries:
+                    raise
+                delay = RETRY_BACKOFF_FACTOR * (2 ** attempt)
+                if response is not None:
+                    delay = _retry_after_seconds(response, default=delay)
+                if not budget.can_fit(delay + budget.min_attempt_seconds):
+                    logger.warning(f"Not retrying {source}: {delay:.0f}s backoff would overrun the run deadline")
+                    raise
+                if not budget.take_retry():
+                    logger.warning(f"Not retrying {source}: run retry budget exhausted")
+                    raise
+                attempt += 1
+                logger.info(f"Retrying {source} in {delay:.1f}s (attempt {attempt + 1}): {e}")
+                with timing.stage("retry_wait"):
+                    time.sleep(delay)
+    
+    try:
+        # Another caller already fetching this URL shares its response instead;
+        # conditional requests only share with identical conditional requests
+        flight_key = source_config["url"]
+        if headers:
+            flight_key = (flight_key, headers.get("If-None-Match"), headers.get("If-Modified-Since"))
+        wait_start = time.perf_counter()
+        try:
+            (timing.status_code, content, timing.etag, timing.last_modified), timing.coalesced = _page_flight.do(
+                flight_key, fetch_page, ttl=timing.page_cache_ttl, timeout=budget.remaining()
+            )
+        except FlightTimeout:
+            # Another run's fetch of this page outlasts this run's deadline
+            timing.coalesced = True
+            budget.deadline_hit = True
+            raise DeadlineExceeded("Run deadline reached waiting for a shared fetch")
+        except Exception:
+            timing.coalesced = "connect" not in timing.stages
+            raise
+        finally:
+            if "connect" not in timing.stages:
+                timing.add_stage_time("download", time.perf_counter() - wait_start)
+        timing.bytes_received = len(content)
+        if not timing.coalesced:
+            breaker.record_success()
+        
+        if timing.status_code == 304:
+            timing.status = "not_modified"
+            logger.info(f"{source} not modified since last poll")
+            return news_items
+        
+        # Parse and filter, in a worker process when the process backend is enabled
+        timing.items_selected, records, stages = _parse_page(source, content, keywords, parse_pool, max_matches)
+        for name, seconds in stages.items():
+            timing.add_stage_time(name, seconds)
+        
+        if not timing.items_selected:
+            logger.warning(f"No items found from {source} - selectors may need updating")
+            timing.status = "empty"
+            return news_items
+        
+        for title, link, matched in records:
+            for kw in matched:
+                KEYWORD_MATCHES.inc(keyword=kw)
+            news_items.append({
+                "source": source.upper(),
+                "title": title,
+                "link": link,
+                "date": datetime.now().strftime("%Y-%m-%d"),
+                "category": "general"
+            })
+        items_processed = len(records)
+        
+        timing.items_matched = items_processed
+        timing.status = "ok"
+        logger.info(f"Successfully processed {items_processed} items from {source}")
+        
+    except DeadlineExceeded:
+        timing.status, timing.error = "deadline", "run deadline reached before fetch"
+        logger.warning(f"Skipping {source} - run deadline reached")
+    except requests.exceptions.Timeout:
+        timing.status, timing.error = "error", "timeout"
+        if not timing.coalesced:
+            breaker.record_failure()
+        logger.error(f"Timeout while fetching from {source}")
+    except requests.exceptions.ConnectionError:
+        timing.status, timing.error = "error", "connection error"
+        if not timing.coalesced:
+            breaker.record_failure()
+        logger.error(f"Connection error while fetching from {source}")
+    except requests.exceptions.HTTPError as e:
+        timing.status, timing.error = "error", f"HTTP {e.response.status_code}"
+        if not timing.coalesced:
+            breaker.record_failure()
+        if e.response.status_code == 429 and not timing.coalesced:
+            # An hour-long Retry-After would otherwise stall every later run for that host
+            penalty = _retry_after_seconds(e.response, default=30)
+            limiter.penalize(source_config["url"], min(penalty, budget.deadline_seconds or MAX_RATE_LIMIT_PENALTY))
+        logger.error(f"HTTP error {e.response.status_code} while fetching from {source}")
+    except requests.exceptions.RequestException as e:
+        timing.status, timing.error = "error", str(e)
+        if not timing.coalesced:
+            breaker.record_failure()
+        logger.error(f"Request error while fetching from {source}: {e}")
+    except Exception as e:
+        timing.status, timing.error = "error", str(e)
+        logger.error(f"Unexpected error scraping {source}: {e}")
+    finally:
+        # A trial that recorded neither outcome (deadline, coalesced, unexpected error)
+        # would otherwise keep the breaker half-open and rejecting for a full cooldown
+        if trial and breaker.is_trial:
+            breaker.release_trial()
+        timing.breaker_state = breaker.state
     
-    logger.info(f"Total news items found: {len(news_items)}")
     return news_items
 
+def _request_error_label(error):
+    """Short description of a failed request, as stored in latency history"""
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "connection error"
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return f"HTTP {error.response.status_code}"
+    return str(error)
+
+def _retry_after_seconds(response, default):
+    """Seconds requested by a Retry-After header (delta or HTTP date), or the default"""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return default
+
 def get_weekly_news(config, geography="all"):
     """
     Fetch last week's news with geographic filtering
@@ -500,22 +923,23 @@ def generate_upsc_questions(config):
 
 def test_sources():
     """Test function to check if sources are accessible"""
-    session = create_session()
+    from source_health import probe_sources
+    
+    probes = probe_sources({name: source_config["url"] for name, source_config in SOURCES.items()})
     results = {}
     
-    for source_name, source_config in SOURCES.items():
-        try:
-            response = session.get(source_config["url"], timeout=10)
-            response.raise_for_status()
+    for source_name, probe in probes.items():
+        if probe["ok"]:
             results[source_name] = {
                 "status": "OK",
-                "status_code": response.status_code,
-                "content_length": len(response.content)
+                "status_code": probe["status_code"],
+                "content_length": probe["content_length"],
+                "latency": probe["latency"]
             }
-        except Exception as e:
+        else:
             results[source_name] = {
                 "status": "ERROR",
-                "error": str(e)
+                "error": probe["error"]
             }
     
     return results
\ No newline at end of file
@@ -0,0 +1,367 @@
+import email
+import logging
+import random
+import smtplib
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+from metrics import OUTBOX_DELIVERIES, SMTP_SEND_SECONDS
+from smtp_connection import SMTPConnectionManager
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+OUTBOX_FILE = "outbox.db"
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+DEAD = "dead"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    recipient TEXT NOT NULL,
+    subject TEXT,
+    message BLOB NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_due ON messages (state, next_attempt);
+"""
+
+def is_permanent_error(error):
+    """True for SMTP rejections that a retry cannot fix, such as an unknown recipient"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    # Bad credentials can be corrected in settings, so they are retried
+    return (isinstance(error, smtplib.SMTPResponseException)
+            and not isinstance(error, smtplib.SMTPAuthenticationError)
+            and 500 <= error.smtp_code < 600)
+
+class Outbox:
+    """
+    Durable spool of rendered messages waiting for delivery, in a SQLite file
+
+    Each message has an idempotency key, and enqueueing a key that is already
+    in the outbox does nothing, so a job that runs twice for the same send slot
+    queues one digest. Senders lease a message while delivering it; a lease left
+    behind by a crashed sender expires and the message is retried. Failed sends
+    are retried with exponential backoff until max_attempts, after which the
+    message is kept as dead rather than deleted.
+    """
+    def __init__(self, path=OUTBOX_FILE, max_attempts=8, retry_base_seconds=30, retry_max_seconds=3600,
+                 lease_seconds=300):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.lease_seconds = lease_seconds
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # Autocommit mode; writes that must be atomic use BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def enqueue(self, msg, idempotency_key):
+        """
+        Spool a message for delivery
+
+        Args:
+            msg (email.message.Message): The rendered message
+            idempotency_key (str): Identity of this send; repeats are ignored
+
+        Returns:
+            bool: True if the message was added, False if the key was already queued
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO messages (idempotency_key, recipient, subject, message, state, next_attempt, "
+                "created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (idempotency_key, msg['To'] or '', msg['Subject'], msg.as_bytes(), PENDING, now, now, now)
+            )
+        if cursor.rowcount == 0:
+            logger.info(f"Outbox already has {idempotency_key} - not queued again")
+        return cursor.rowcount == 1
+
+    def claim(self, owner):
+        """
+        Lease the oldest message that is due, first re-queueing expired leases
+
+        A message whose lease expired after its last allowed attempt, e.g. one
+        that crashes or hangs its sender every time, is marked dead instead.
+
+        Returns:
+            dict: id, recipient, attempts and the message bytes, or None if nothing is due
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                expired = conn.execute(
+                    "SELECT id, recipient, lease_owner, attempts FROM messages WHERE state = ? AND lease_expires < ?",
+                    (SENDING, now)
+                ).fetchall()
+                for message_id, recipient, lease_owner, attempts in expired:
+                    state = PENDING if attempts < self.max_attempts else DEAD
+                    conn.execute(
+                        "UPDATE messages SET state = ?, lease_owner = NULL, lease_expires = NULL, "
+                        "error = ?, updated = ? WHERE id = ?",
+                        (state, f"lease held by {lease_owner} expired", now, message_id)
+                    )
+                    logger.warning(f"Lease on digest to {recipient} held by {lease_owner} expired "
+                                   f"after {attempts} attempt(s) - {state}")
+                    if state == DEAD:
+                        OUTBOX_DELIVERIES.inc(outcome="dead")
+                row = conn.execute(
+                    "SELECT id, recipient, attempts, message FROM messages WHERE state = ? AND next_attempt <= ? "
+                    "ORDER BY next_attempt, id LIMIT 1", (PENDING, now)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE messages SET state = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ?, "
+                        "updated = ? WHERE id = ?", (SENDING, owner, now + self.lease_seconds, now, row[0])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        message_id, recipient, attempts, data = row
+        return {"id": message_id, "recipient": recipient, "attempts": attempts + 1, "message": data}
+
+    def mark_sent(self, message_id, owner):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE messages SET state = ?, message = x'', error = NULL, lease_owner = NULL, "
+                "lease_expires = NULL, updated = ? WHERE id = ? AND lease_owner = ?",
+                (SENT, time.time(), message_id, owner)
+            )
+
+    def retry_delay(self, attempts):
+        """Seconds before the next attempt: doubling from the base, capped, with 10% jitter"""
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempts - 1))
+        return delay * random.uniform(0.9, 1.1)
+
+    def mark_failed(self, message_id, owner, attempts, error, permanent=False):
+        """
+        Schedule a retry with backoff, or mark the message dead
+
+        Returns:
+            str: The new state, PENDING or DEAD
+        """
+        now = time.time()
+        state = DEAD if permanent or attempts >= self.max_attempts else PENDING
+        next_attempt = now + self.retry_delay(attempts) if state == PENDING else now
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE messages SET state = ?, next_attempt = ?, error = ?, lease_owner = NULL, "
+                "lease_expires = NULL, updated = ? WHERE id = ? AND lease_owner = ?",
+                (state, next_attempt, str(error), now, message_id, owner)
+            )
+        return state
+
+    def next_due_in(self):
+        """Seconds until the next pending message is due, or None if none are pending"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT MIN(next_attempt) FROM messages WHERE state = ?", (PENDING,)).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def counts(self):
+        """Number of messages in each state"""
+        with closing(self._connect()) as conn:
+            return dict(conn.execute("SELECT state, COUNT(*) FROM messages GROUP BY state").fetchall())
+
+    def dead_messages(self):
+        """Recipient, subject, attempts and last error of every dead message"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, recipient, subject, attempts, error FROM messages WHERE state = ? ORDER BY id", (DEAD,)
+            ).fetchall()
+        return [dict(zip(("id", "recipient", "subject", "attempts", "error"), row)) for row in rows]
+
+    def requeue_dead(self):
+        """Give every dead message a fresh set of attempts, e.g. after fixing SMTP settings"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE messages SET state = ?, attempts = 0, next_attempt = ?, updated = ? WHERE state = ?",
+                (PENDING, now, now, DEAD)
+            )
+        return cursor.rowcount
+
+    def purge(self, older_than_seconds=30 * 86400):
+        """Delete sent messages older than the given age; dead ones are kept"""
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM messages WHERE state = ? AND updated < ?",
+                         (SENT, time.time() - older_than_seconds))
+
+_outboxes = {}
+_outboxes_lock = threading.Lock()
+
+def get_outbox(config):
+    """Return the process-wide outbox for the configured path"""
+    path = config.get('outbox_path', OUTBOX_FILE)
+    with _outboxes_lock:
+        outbox = _outboxes.get(path)
+        if outbox is None:
+            outbox = Outbox(
+                path,
+                max_attempts=config.get('outbox_max_attempts', 8),
+                retry_base_seconds=config.get('outbox_retry_base_seconds', 30),
+                retry_max_seconds=config.get('outbox_retry_max_seconds', 3600)
+            )
+            _outboxes[path] = outbox
+        return outbox
+
+class OutboxWorker:
+    """
+    Background senders that drain the outbox
+
+    'outbox_concurrency' threads each claim one message at a time and send it
+    over their own reused SMTP connection, so at most that many sends are in
+    flight. Idle senders sleep until wake() is called after an enqueue, or until
+    the next retry is due, checking at least every 'outbox_poll_seconds'.
+    Delivery is at least once: a sender killed after the server accepted a
+    message but before recording it leaves a lease that expires and is retried.
+    When the outbox is drained, sent messages older than 'outbox_retention_days'
+    are purged, at most once an hour.
+    """
+    def __init__(self, config):
+        self.config = dict(config)
+        self.outbox = get_outbox(config)
+        self.owner = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self._threads = []
+        self._last_purge = 0.0
+        self._generation = 0
+        self._stopping = False
+        self._condition = threading.Condition()
+
+    def start(self):
+        concurrency = max(1, self.config.get('outbox_concurrency', 2))
+        for index in range(concurrency):
+            thread = threading.Thread(target=self._run, name=f"outbox-sender-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Outbox worker started with {concurrency} sender(s)")
+        return self
+
+    def update_config(self, config):
+        """Use new SMTP settings from the next send on"""
+        self.config = dict(config)
+        self.wake()
+
+    def wake(self):
+        """Tell idle senders that new messages may be due"""
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+
+    def stop(self, timeout=30):
+        """Stop the senders after their current send"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        logger.info("Outbox worker stopped")
+
+    def _run(self):
+        manager = None
+        try:
+            while not self._stopping:
+                generation = self._generation
+                try:
+                    entry = self.outbox.claim(self.owner)
+                except sqlite3.Error as e:
+                    logger.error(f"Outbox claim failed: {e}")
+                    entry = None
+                if entry is not None:
+                    try:
+                        manager = self._send(entry, manager)
+                    except Exception as e:
+                        # Never let one message end the sender; its lease expires and it is retried
+                        logger.error(f"Outbox sender failed on digest to {entry['recipient']}: {e}", exc_info=True)
+                    continue
+                self._purge_if_due()
+                timeout = self.config.get('outbox_poll_seconds', 15)
+                try:
+                    due_in = self.outbox.next_due_in()
+                except sqlite3.Error:
+                    due_in = None
+                if due_in is not None:
+                    timeout = min(timeout, due_in)
+                with self._condition:
+                    self._condition.wait_for(lambda: self._stopping or self._generation != generation, timeout)
+        finally:
+            if manager is not None:
+                manager.close()
+
+    def _purge_if_due(self):
+        """Delete old sent messages, at most once an hour across this worker's senders"""
+        now = time.monotonic()
+        with self._condition:
+            if self._last_purge and now - self._last_purge < 3600:
+                return
+            self._last_purge = now
+        try:
+            self.outbox.purge(self.config.get('outbox_retention_days', 30) * 86400)
+        except sqlite3.Error as e:
+            logger.error(f"Outbox purge failed: {e}")
+
+    def _manager(self, manager):
+        """This sender's connection, replaced when the SMTP settings change"""
+        config = self.config
+        account = (config['smtp_server'], config['smtp_port'], config['smtp_username'], config['smtp_password'])
+        if manager is not None and (manager.server, manager.port, manager.username, manager.password) == account:
+            return manager
+        if manager is not None:
+            manager.close()
+        return SMTPConnectionManager.from_config(config)
+
+    def _send(self, entry, manager):
+        """Deliver one claimed message and record the outcome; returns the connection to reuse"""
+        send_start = time.perf_counter()
+        try:
+            # Bad SMTP settings fail here and are retried like any other failed send
+            manager = self._manager(manager)
+            manager.send(email.message_from_bytes(entry['message']))
+        except Exception as e:
+            SMTP_SEND_SECONDS.observe(time.perf_counter() - send_start, outcome="error")
+            try:
+                state = self.outbox.mark_failed(entry['id'], self.owner, entry['attempts'], e, is_permanent_error(e))
+            except sqlite3.Error as db_error:
+                logger.error(f"Could not record failed digest to {entry['recipient']}: {db_error} - "
+                             f"it is retried when its lease expires")
+                return manager
+            OUTBOX_DELIVERIES.inc(outcome="dead" if state == DEAD else "retry")
+            if state == DEAD:
+                logger.error(f"Giving up on digest to {entry['recipient']} after {entry['attempts']} attempt(s): {e}")
+            else:
+                logger.warning(f"Digest to {entry['recipient']} failed (attempt {entry['attempts']}), will retry: {e}")
+            return manager
+        SMTP_SEND_SECONDS.observe(time.perf_counter() - send_start, outcome="success")
+        try:
+            self.outbox.mark_sent(entry['id'], self.owner)
+        except sqlite3.Error as e:
+            logger.error(f"Delivered digest to {entry['recipient']} but could not record it: {e} - "
+                         f"it may be sent again when its lease expires")
+            return manager
+        OUTBOX_DELIVERIES.inc(outcome="sent")
+        logger.info(f"Delivered digest to {entry['recipient']} from the outbox")
+        return manager
@@ -0,0 +1,217 @@
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Tokens refill continuously at `rate` per second up to `capacity`. acquire()
+    blocks until a token is available, or gives up when that would take longer
+    than its max_wait.
+    """
+    def __init__(self, rate, capacity=1, start_delay=0.0):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        # Tokens are unavailable until this monotonic time (start offset or 429 penalty)
+        self._blocked_until = self._updated + start_delay
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def acquire(self, max_wait=None):
+        """
+        Take one token, sleeping as needed
+
+        Args:
+            max_wait (float): Longest time to wait, or None to wait as long as needed
+
+        Returns:
+            float: Seconds spent waiting, or None if no token came within max_wait
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._blocked_until:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    delay = (1 - self._tokens) / self.rate
+                else:
+                    delay = self._blocked_until - now
+            if max_wait is not None and waited + delay > max_wait:
+                return None
+            time.sleep(delay)
+            waited += delay
+
+    def block_for(self, seconds):
+        """Hold all tokens for a period, e.g. after a 429 with Retry-After"""
+        with self._lock:
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._tokens = 0
+            self._updated = now
+
+class HostRateLimiter:
+    """
+    One token bucket per host, created on first use
+
+    Each new bucket starts after a random offset of up to max_start_jitter seconds
+    so that hosts first contacted at the same moment do not all fire together.
+    """
+    def __init__(self, default_rate=1.0, burst=2, host_rates=None, max_start_jitter=0.5):
+        self.default_rate = default_rate
+        self.burst = burst
+        self.host_rates = dict(host_rates or {})
+        self.max_start_jitter = max_start_jitter
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate = self.host_rates.get(host, self.default_rate)
+                bucket = TokenBucket(rate, self.burst, random.uniform(0, self.max_start_jitter))
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url, max_wait=None):
+        """Wait for permission to send a request to this URL's host; returns seconds waited, or None after max_wait"""
+        return self.bucket(urlparse(url).hostname).acquire(max_wait)
+
+    def penalize(self, url, seconds):
+        """Pause a host, typically after it answered 429 Too Many Requests"""
+        host = urlparse(url).hostname
+        logger.warning(f"Rate limited by {host} - pausing requests for {seconds:.0f}s")
+        self.bucket(host).block_for(seconds)
+
+class PolitenessScheduler:
+    """
+    Runs per-URL tasks concurrently while staying polite to each host
+
+    Tasks are interleaved round-robin across hosts, so one busy host does not
+    hold up the others; every task waits for its host's token bucket, and at most
+    max_per_host tasks talk to the same host at once.
+    """
+    def __init__(self, limiter, max_workers=4, max_per_host=2):
+        self.limiter = limiter
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, host):
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_per_host)
+                self._host_slots[host] = slot
+            return slot
+
+    def _run_one(self, url, task, max_wait):
+        slot = self._slot(urlparse(url).hostname)
+        if not slot.acquire(timeout=max_wait() if max_wait else None):
+            return task(None)
+        try:
+            waited = self.limiter.acquire(url, max_wait() if max_wait else None)
+            return task(waited)
+        finally:
+            slot.release()
+
+    def run(self, tasks, max_wait=None):
+        """
+        Run tasks and return their results in the original order
+
+        Args:
+            tasks (list): (url, callable) pairs; each callable receives the seconds
+                it waited for its host's rate limit, or None if it could not start in time
+            max_wait (callable): Returns how much longer tasks may wait for their
+                host, e.g. the time left before a run deadline, or None for no limit
+
+        Returns:
+            list: Task results (exceptions are re-raised from the failing task)
+        """
+        by_host = OrderedDict()
+        for index, (url, task) in enumerate(tasks):
+            by_host.setdefault(urlparse(url).hostname, []).append((index, url, task))
+
+        interleaved = []
+        while by_host:
+            for host in list(by_host):
+                interleaved.append(by_host[host].pop(0))
+                if not by_host[host]:
+                    del by_host[host]
+
+        results = [None] * len(tasks)
+        workers = max(1, min(self.max_workers, len(tasks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as executor:
+            futures = [(index, executor.submit(self._run_one, url, task, max_wait))
+                       for index, url, task in interleaved]
+            for index, future in futures:
+                results[index] = future.result()
+        return results
+
+def get_rate_limiter(config):
+    """
+    Return the process-wide per-host rate limiter
+
+    The limiter is shared so the UI, the scheduler and the health prober draw from
+    the same per-host budgets. It is rebuilt when the rate settings change.
+
+    Args:
+        config (dict): Configuration; reads default_host_rate, host_burst and host_rate_limits
+    """
+    settings = (
+        float(config.get('default_host_rate', 1.0)),
+        int(config.get('host_burst', 2)),
+        tuple(sorted((config.get('host_rate_limits') or {}).items()))
+    )
+    with _limiters_lock:
+        limiter = _limiters.get(settings)
+        if limiter is None:
+            limiter = HostRateLimiter(settings[0], settings[1], dict(settings[2]))
+            _limiters.clear()
+            _limiters[settings] = limiter
+        return limiter
+
+def get_politeness_scheduler(config):
+    """
+    Return the process-wide politeness scheduler
+
+    Like the rate limiter it is shared, so runs from the UI and the scheduler that
+    overlap still send at most max_requests_per_host requests to a host at once.
+    It is rebuilt when the limiter or the concurrency settings change.
+
+    Args:
+        config (dict): Configuration; reads max_fetch_workers and max_requests_per_host
+            as well as the rate limiter settings
+    """
+    limiter = get_rate_limiter(config)
+    settings = (int(config.get('max_fetch_workers', 4)), int(config.get('max_requests_per_host', 2)))
+    with _schedulers_lock:
+        scheduler = _schedulers.get(settings)
+        if scheduler is None or scheduler.limiter is not limiter:
+            scheduler = PolitenessScheduler(limiter, max_workers=settings[0], max_per_host=settings[1])
+            _schedulers.clear()
+            _schedulers[settings] = scheduler
+        return scheduler
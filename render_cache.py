@@ -0,0 +1,132 @@
+import hashlib
+import itertools
+import logging
+import threading
+from collections import OrderedDict
+
+from digest_renderer import TEMPLATE_VERSION, render_compact_item_html, render_digest, render_item_html
+from metrics import CACHE_REQUESTS, record_cache_lookup
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+def digest_hash(news_items, sent_at, *extra):
+    """
+    Content hash of a digest: the template version, the rendered timestamps and
+    the ordered articles, plus any extra strings such as message headers
+    """
+    digest = hashlib.sha256(f"v{TEMPLATE_VERSION}\0{sent_at:%Y-%m-%d %H:%M}".encode('utf-8'))
+    for value in extra:
+        digest.update(b"\1" + str(value).encode('utf-8'))
+    for item in news_items:
+        digest.update(f"\2{item['source']}\0{item['title']}\0{item.get('link', '')}".encode('utf-8'))
+    return digest.hexdigest()
+
+class _LRU:
+    def __init__(self, name, max_entries):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        record_cache_lookup(self.name, value is not None)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class RenderCache:
+    """
+    Caches rendered digests, their article blocks and finished messages
+
+    The same articles are often rendered several times: the test email, the
+    prefetch and the scheduled send, retries, and recipients with the same
+    profile. Whole digests are keyed by a content hash of the ordered articles,
+    the template version and the timestamps shown in the body. Each article's
+    news-item block is cached separately, so a digest that differs by a few
+    articles only renders the new ones. Finished MIME messages are cached by the
+    same hash plus their headers; callers must not modify a returned message.
+    """
+    def __init__(self, max_digests=16, max_fragments=20000, max_messages=64):
+        self._digests = _LRU("render_digest", max_digests)
+        # Article blocks are looked up thousands of times per digest, so they live
+        # in a plain dict read without locking and evicted oldest-first
+        self._fragments = {}
+        self._fragment_lock = threading.Lock()
+        self.max_fragments = max_fragments
+        self._messages = _LRU("render_message", max_messages)
+
+    def render(self, news_items, sent_at, compact=False):
+        """
+        Render a digest, reusing a cached copy of identical content
+
+        Returns:
+            tuple: (html, text) as from digest_renderer.render_digest
+        """
+        key = digest_hash(news_items, sent_at, "compact") if compact else digest_hash(news_items, sent_at)
+        bodies = self._digests.get(key)
+        if bodies is None:
+            bodies = self._render_items(news_items, sent_at, compact)
+            self._digests.put(key, bodies)
+        return bodies
+
+    def _render_items(self, news_items, sent_at, compact):
+        fragments = self._fragments
+        rendered = {}
+        render_item = render_compact_item_html if compact else render_item_html
+
+        def item_html(item):
+            key = (compact, item['title'], item.get('link', ''))
+            block = fragments.get(key)
+            if block is None:
+                block = rendered[key] = render_item(item)
+            return block
+
+        bodies = render_digest(news_items, sent_at, item_html=item_html, compact=compact)
+        with self._fragment_lock:
+            fragments.update(rendered)
+            excess = len(fragments) - self.max_fragments
+            if excess > 0:
+                for key in list(itertools.islice(fragments, excess)):
+                    del fragments[key]
+        # One metric update per digest rather than per article
+        CACHE_REQUESTS.inc(len(news_items) - len(rendered), cache="render_fragment", result="hit")
+        CACHE_REQUESTS.inc(len(rendered), cache="render_fragment", result="miss")
+        return bodies
+
+    def get_message(self, key):
+        return self._messages.get(key)
+
+    def store_message(self, key, msg):
+        self._messages.put(key, msg)
+
+    def clear(self):
+        self._digests.clear()
+        with self._fragment_lock:
+            self._fragments.clear()
+        self._messages.clear()
+
+    def to_dict(self):
+        return {
+            "digests": len(self._digests),
+            "fragments": len(self._fragments),
+            "messages": len(self._messages)
+        }
+
+render_cache = RenderCache()
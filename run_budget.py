@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class DeadlineExceeded(Exception):
+    """Raised when there is no time left in the run for another request"""
+
+class RunBudget:
+    """
+    Deadline and shared retry allowance for one scraping run
+
+    Every source draws retries from the same allowance, so a handful of failing
+    sites cannot spend minutes backing off between them. Once the deadline is too
+    close to fit another attempt, retries stop and the run returns what it has.
+    """
+    def __init__(self, deadline_seconds=None, retry_allowance=6, min_attempt_seconds=3):
+        self.started = time.monotonic()
+        self.min_attempt_seconds = min_attempt_seconds
+        self.deadline_seconds = deadline_seconds or None
+        self.deadline = self.started + deadline_seconds if deadline_seconds else None
+        self.retry_allowance = retry_allowance
+        self.retries_used = 0
+        self.deadline_hit = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            deadline_seconds=config.get('run_deadline_seconds', 240),
+            retry_allowance=config.get('run_retry_budget', 6),
+            min_attempt_seconds=config.get('timeout_floor_seconds', 3)
+        )
+
+    def remaining(self):
+        """Seconds left before the deadline, or None without a deadline"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def wait_allowance(self):
+        """Seconds a request may still wait to start and leave time for one attempt, or None without a deadline"""
+        remaining = self.remaining()
+        if remaining is None:
+            return None
+        return max(0.0, remaining - self.min_attempt_seconds)
+
+    def can_fit(self, seconds):
+        """True if an operation taking this long would finish before the deadline"""
+        remaining = self.remaining()
+        fits = remaining is None or remaining >= seconds
+        if not fits:
+            self.deadline_hit = True
+        return fits
+
+    def clamp_timeout(self, timeout):
+        """
+        Shorten a request timeout so it ends at the deadline
+
+        Raises:
+            DeadlineExceeded: If the deadline has already passed
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            self.deadline_hit = True
+            raise DeadlineExceeded("Run deadline reached")
+        return min(timeout, remaining)
+
+    def take_retry(self):
+        """Take one retry from the shared allowance; False when it is used up"""
+        with self._lock:
+            if self.retries_used >= self.retry_allowance:
+                return False
+            self.retries_used += 1
+            return True
+
+    def to_dict(self):
+        return {
+            "retries_used": self.retries_used,
+            "retry_allowance": self.retry_allowance,
+            "deadline_seconds": round(self.deadline - self.started, 1) if self.deadline else None,
+            "deadline_hit": self.deadline_hit
+        }
@@ -0,0 +1,125 @@
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+RUN_LEDGER_FILE = "scheduler_runs.db"
+
+# Outcomes after which a scheduled send does not need to be made up
+COMPLETED_OUTCOMES = ("success", "empty", "skipped")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    scheduled_for TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL,
+    outcome TEXT,
+    items INTEGER,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_job_scheduled ON runs (job_id, scheduled_for);
+"""
+
+class RunLedger:
+    """
+    SQLite record of every scheduled job run
+
+    Each run stores the slot it was scheduled for, so after downtime the scheduler
+    can tell which daily sends never happened.
+    """
+    def __init__(self, path=RUN_LEDGER_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._lock, closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def start(self, job_id, scheduled_for):
+        """Record that a run for the scheduled_for slot began; returns its id"""
+        with self._lock, closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT INTO runs (job_id, scheduled_for, started) VALUES (?, ?, ?)",
+                (job_id, scheduled_for.isoformat(timespec='minutes'), time.time())
+            )
+            return cursor.lastrowid
+
+    def finish(self, run_id, outcome, items=None, detail=None):
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE runs SET finished = ?, outcome = ?, items = ?, detail = ? WHERE id = ?",
+                (time.time(), outcome, items, detail, run_id)
+            )
+
+    def last_completed(self, job_id):
+        """
+        The latest slot a run of job_id completed for
+
+        Returns:
+            datetime: The slot, or None if the job never completed
+        """
+        placeholders = ", ".join("?" for _ in COMPLETED_OUTCOMES)
+        with self._lock, closing(self._connect()) as conn:
+            row = conn.execute(
+                f"SELECT MAX(scheduled_for) FROM runs WHERE job_id = ? AND outcome IN ({placeholders})",
+                (job_id, *COMPLETED_OUTCOMES)
+            ).fetchone()
+        return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+def missed_daily_slots(last_completed, hour, minute, now=None, max_days=7):
+    """
+    Daily hour:minute slots on days after last_completed that have already passed
+
+    Comparing by day keeps a send_time change from counting today's completed
+    send as missed.
+
+    Args:
+        last_completed (datetime): Latest completed slot; None means nothing is missed
+        hour (int): Slot hour
+        minute (int): Slot minute
+        now (datetime): Current time
+        max_days (int): Only the most recent this many slots are returned
+
+    Returns:
+        list: Missed slots as datetimes, oldest first
+    """
+    if last_completed is None or max_days <= 0:
+        return []
+    now = now or datetime.now()
+    slot = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if slot > now:
+        slot -= timedelta(days=1)
+    missed = []
+    while slot.date() > last_completed.date() and len(missed) < max_days:
+        missed.append(slot)
+        slot -= timedelta(days=1)
+    return list(reversed(missed))
+
+_ledgers = {}
+_ledgers_lock = threading.Lock()
+
+def get_run_ledger(config):
+    """
+    Return the process-wide run ledger for the configured database
+
+    Args:
+        config (dict): Configuration; reads run_ledger_path
+
+    Returns:
+        RunLedger: Shared ledger
+    """
+    path = config.get('run_ledger_path', RUN_LEDGER_FILE)
+    with _ledgers_lock:
+        ledger = _ledgers.get(path)
+        if ledger is None:
+            ledger = RunLedger(path)
+            _ledgers[path] = ledger
+        return ledger
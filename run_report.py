@@ -0,0 +1,156 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Stages recorded for every source, in pipeline order
+STAGES = ["rate_wait", "dns", "connect", "download", "retry_wait", "parse", "select", "filter", "link_extraction"]
+
+_last_report = None
+_last_report_lock = threading.Lock()
+
+class SourceTiming:
+    """Per-stage timings and counters for a single source within a run"""
+    def __init__(self, source, url):
+        self.source = source
+        self.url = url
+        self.stages = {}
+        self.bytes_received = 0
+        self.status_code = None
+        self.items_selected = 0
+        self.items_matched = 0
+        self.status = "pending"
+        self.error = None
+        self.breaker_state = None
+        self.timeout = None
+        self.retries = None
+        self.coalesced = False
+        self.attempts = 0
+        self.etag = None
+        self.last_modified = None
+        self.page_cache_ttl = 0
+
+    @contextmanager
+    def stage(self, name):
+        """Time a pipeline stage; repeated stages accumulate"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, time.perf_counter() - start)
+
+    def add_stage_time(self, name, seconds):
+        """Add elapsed seconds to a stage"""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @property
+    def network_seconds(self):
+        return sum(self.stages.get(name, 0.0) for name in ("dns", "connect", "download"))
+
+    @property
+    def processing_seconds(self):
+        return sum(self.stages.get(name, 0.0) for name in ("parse", "select", "filter", "link_extraction"))
+
+    def to_dict(self):
+        return {
+            "source": self.source,
+            "url": self.url,
+            "status": self.status,
+            "error": self.error,
+            "status_code": self.status_code,
+            "breaker_state": self.breaker_state,
+            "timeout": self.timeout,
+            "retries": self.retries,
+            "coalesced": self.coalesced,
+            "attempts": self.attempts,
+            "bytes_received": self.bytes_received,
+            "items_selected": self.items_selected,
+            "items_matched": self.items_matched,
+            "stages_ms": {name: round(self.stages[name] * 1000, 2) for name in STAGES if name in self.stages},
+            "network_ms": round(self.network_seconds * 1000, 2),
+            "processing_ms": round(self.processing_seconds * 1000, 2)
+        }
+
+class ScrapeRunReport:
+    """Structured report describing one run of the scraping pipeline"""
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.finished_at = None
+        self.sources = {}
+        self.budget = None
+        self._start = time.perf_counter()
+        self._duration = None
+
+    def source(self, name, url):
+        """Get or create the timing record for a source"""
+        if name not in self.sources:
+            self.sources[name] = SourceTiming(name, url)
+        return self.sources[name]
+
+    def finish(self):
+        """Mark the run as complete"""
+        self.finished_at = datetime.now()
+        self._duration = time.perf_counter() - self._start
+
+    @property
+    def duration_seconds(self):
+        if self._duration is not None:
+            return self._duration
+        return time.perf_counter() - self._start
+
+    @property
+    def total_items(self):
+        return sum(timing.items_matched for timing in self.sources.values())
+
+    def summary(self):
+        """One-line human readable summary for the activity log"""
+        network = sum(timing.network_seconds for timing in self.sources.values())
+        processing = sum(timing.processing_seconds for timing in self.sources.values())
+        failed = sum(1 for timing in self.sources.values() if timing.status not in ("ok", "not_modified"))
+        summary = (f"{len(self.sources)} sources, {self.total_items} items in {self.duration_seconds:.2f}s "
+                   f"(network {network:.2f}s, parsing {processing:.2f}s, {failed} failed)")
+        if self.budget is not None:
+            summary += f", {self.budget.retries_used} retries"
+            if self.budget.deadline_hit:
+                summary += ", deadline reached"
+        return summary
+
+    def to_dict(self):
+        return {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration_ms": round(self.duration_seconds * 1000, 2),
+            "total_items": self.total_items,
+            "budget": self.budget.to_dict() if self.budget else None,
+            "sources": [timing.to_dict() for timing in self.sources.values()]
+        }
+
+def write_report_jsonl(report, path):
+    """
+    Append a run report to a JSONL file
+
+    Args:
+        report (ScrapeRunReport): Completed run report
+        path (str): Destination file; one JSON object per line
+    """
+    try:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report.to_dict()) + "\n")
+    except OSError as e:
+        logger.error(f"Failed to write run report to {path}: {e}")
+
+def set_last_report(report):
+    """Keep the most recent run report in memory for the UI"""
+    global _last_report
+    with _last_report_lock:
+        _last_report = report
+
+def get_last_report():
+    """Return the most recent run report, or None if nothing has run yet"""
+    with _last_report_lock:
+        return _last_report
@@ -1,109 +1,520 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.executors.pool import ThreadPoolExecutor
-from datetime import datetime
+from apscheduler.events import EVENT_JOB_MISSED
+from datetime import datetime, timedelta
 import logging
-from email_manager import send_news_email
-from news_scraper import get_upsc_news
+import threading
+from contextlib import nullcontext
+from email_manager import build_news_message, deliver_message, deliver_message_async
+from async_delivery import get_delivery_loop
+from news_scraper import get_upsc_news, poll_upsc_news
+from metrics import NEWS_EMAIL_JOB_SECONDS
+from digest_cache import DigestCache, PreparedDigest, dedup_news_items
+from news_archive import get_news_archive
+from run_ledger import get_run_ledger, missed_daily_slots
+from job_history import JobRun, JobRunHistory, JOB_HISTORY_FILE
+from work_queue import fetch_news_via_queue, poll_news_via_queue
+from fanout import union_config, render_fan_out, deliver_fan_out
+from outbox import OutboxWorker, get_outbox
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-def schedule_daily_email(config):
+# Digest prepared ahead of send_time by the prefetch job
+digest_cache = DigestCache()
+
+def _next_send_at(hour, minute, now=None):
+    """The next occurrence of hour:minute, today or tomorrow"""
+    now = now or datetime.now()
+    send_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if send_at < now:
+        send_at += timedelta(days=1)
+    return send_at
+
+def _email_configured(config):
+    return bool((config.get('email') or config.get('recipients')) and config.get('smtp_username'))
+
+def _fetch_config(config):
+    """With recipient profiles, fetch the union of their sources and keywords once"""
+    return union_config(config) if config.get('recipients') else config
+
+def _render_digest(config, news_items, sent_at=None, subject=None):
+    """One message, or a list of per-recipient messages when recipients are configured"""
+    if config.get('recipients'):
+        return render_fan_out(config, news_items, sent_at, subject)
+    return build_news_message(config, news_items, sent_at, subject)
+
+def _deliver_digest(config, message):
     """
-    Set up a background scheduler for daily news email delivery
+    Send a digest from _render_digest
+    
+    Raises:
+        Exception: If the single message, or every fan-out message, failed
+    """
+    if not isinstance(message, list):
+        if config.get('smtp_async', False):
+            get_delivery_loop().submit(deliver_message_async(config, message)).result()
+        else:
+            deliver_message(config, message)
+        return
+    sent, failures = deliver_fan_out(config, message)
+    for email, error in failures:
+        logger.error(f"Digest to {email} failed: {error}")
+    if failures and not sent:
+        raise Exception(f"All {len(failures)} digests failed to send")
+
+def _queue_digest(config, message, key):
+    """
+    Spool a digest from _render_digest in the outbox for the delivery worker
     
     Args:
-        config (dict): Configuration containing send_time and other settings
+        key (str): Identity of the send, e.g. the job and slot; each recipient's
+            message is queued under key plus its address, at most once
+    
+    Returns:
+        int: Number of messages newly queued
+    """
+    outbox = get_outbox(config)
+    entries = message if isinstance(message, list) else [(config['email'], message, None)]
+    return sum(outbox.enqueue(msg, f"{key}:{email}") for email, msg, _ in entries)
+
+def poll_sources(config):
+    """
+    Poll sources with conditional requests and archive newly seen articles
+    
+    With 'fetch_backend' set to "queue" the polling is done by the queue workers.
+    
+    Args:
+        config (dict): Configuration
+        
+    Returns:
+        int: Number of articles added to the archive
+    """
+    config = _fetch_config(config)
+    archive = get_news_archive(config)
+    if config.get('fetch_backend', 'local') == 'queue':
+        news_items, validators = poll_news_via_queue(config, archive.validators())
+    else:
+        news_items, _, validators = poll_upsc_news(config, archive.validators())
+    archive.save_validators(validators)
+    added = archive.ingest(news_items)
+    archive.prune(config.get('archive_retention_days', 30))
+    logger.info(f"Archived {added} new articles from {len(news_items)} polled items")
+    return added
+
+def _archived_items(config, hours):
+    """
+    Archived articles from the last `hours` for the current sources and keywords
+    
+    Like a live fetch, at most 'max_items_per_source' articles per source are
+    kept, the newest ones, and the result is newest first.
+    """
+    keywords = [kw.lower().strip() for kw in config.get('keywords', []) if kw.strip()]
+    sources = {source.upper() for source in config.get('sources', [])}
+    max_per_source = config.get('max_items_per_source', 10)
+    counts = {}
+    news_items = []
+    for item in get_news_archive(config).recent(hours=hours, newest_first=True):
+        if item['source'].upper() not in sources or not any(kw in item['title'].lower() for kw in keywords):
+            continue
+        count = counts.get(item['source'], 0)
+        if max_per_source and count >= max_per_source:
+            continue
+        counts[item['source']] = count + 1
+        news_items.append(item)
+    return news_items
+
+def collect_digest_items(config):
+    """
+    Items for the daily digest
+    
+    With polling enabled this is the last 24 hours of the archive (after one more
+    poll to pick up anything since the previous one), filtered by the current
+    keywords. Without polling, or while the archive is still empty, the sources
+    are scraped live, or by queue workers when 'fetch_backend' is "queue".
+    
+    Args:
+        config (dict): Configuration
         
     Returns:
-        BackgroundScheduler: Configured and started scheduler
+        list: Deduplicated news items
+    """
+    config = _fetch_config(config)
+    if config.get('poll_interval_minutes', 30) > 0:
+        try:
+            poll_sources(config)
+            news_items = _archived_items(config, hours=24)
+            if news_items:
+                return news_items
+            logger.warning("No archived articles from the last 24 hours - fetching live")
+        except Exception as e:
+            logger.error(f"Reading the news archive failed, fetching live: {e}", exc_info=True)
+    if config.get('fetch_backend', 'local') == 'queue':
+        return dedup_news_items(fetch_news_via_queue(config))
+    return dedup_news_items(get_upsc_news(config))
+
+def _stage(run, name):
+    """Time a stage on run, if there is one"""
+    return run.stage(name) if run else nullcontext()
+
+def prefetch_digest(config, send_at, run=None):
+    """
+    Fetch, deduplicate and render the digest for send_at into digest_cache
+    
+    Args:
+        config (dict): Configuration
+        send_at (datetime): The send time the digest is for
+        run (JobRun): Optional run to record stage timings on
         
+    Returns:
+        PreparedDigest: The cached digest, or None if there was nothing to send
+    """
+    with _stage(run, "collect"):
+        news_items = collect_digest_items(config)
+    if not news_items:
+        logger.warning("Prefetch found no news items - the send job will fetch again")
+        return None
+    with _stage(run, "render"):
+        message = _render_digest(config, news_items, send_at)
+    digest = PreparedDigest(send_at, news_items, message)
+    digest_cache.store(digest)
+    logger.info(f"Prefetched digest with {len(news_items)} items for {send_at:%Y-%m-%d %H:%M}")
+    return digest
+
+def _parse_send_time(send_time):
+    """
+    Split an HH:MM send time into hour and minute
+    
     Raises:
-        ValueError: If configuration is invalid
-        Exception: If scheduler fails to start
+        ValueError: If the format or values are invalid
     """
+    if ':' not in send_time:
+        raise ValueError(f"Invalid send_time format: {send_time}. Expected HH:MM")
+    
     try:
+        hour, minute = map(int, send_time.split(':'))
+        if not (0 <= hour <= 23) or not (0 <= minute <= 59):
+            raise ValueError(f"Invalid time values: {hour}:{minute}")
+    except ValueError as e:
+        raise ValueError(f"Invalid send_time format: {send_time}. {e}")
+    return hour, minute
+
+class NewsSchedulerService:
+    """
+    Long-lived background scheduler for the news jobs
+    
+    The APScheduler instance and its thread pool are created once. update_config
+    swaps the configuration atomically and reschedules, adds or removes only the
+    jobs whose timing changed, so in-flight runs finish undisturbed and the next
+    run of every job reads the new settings.
+    """
+    def __init__(self, config):
         # Validate configuration
         if not config:
             raise ValueError("Configuration is required")
+        _parse_send_time(config.get('send_time', '07:00'))
         
-        send_time = config.get('send_time', '07:00')
-        if ':' not in send_time:
-            raise ValueError(f"Invalid send_time format: {send_time}. Expected HH:MM")
-        
-        try:
-            hour, minute = map(int, send_time.split(':'))
-            if not (0 <= hour <= 23) or not (0 <= minute <= 59):
-                raise ValueError(f"Invalid time values: {hour}:{minute}")
-        except ValueError as e:
-            raise ValueError(f"Invalid send_time format: {send_time}. {e}")
+        self.config = dict(config)
+        self.history = JobRunHistory(config.get('job_history_path', JOB_HISTORY_FILE))
+        self.outbox_worker = None
+        self._job_specs = {}
+        self._lock = threading.Lock()
         
         # Configure scheduler with custom executor
         executors = {
             'default': ThreadPoolExecutor(max_workers=2)
         }
         
-        job_defaults = {
+        self.job_defaults = {
             'coalesce': True,  # Combine multiple pending instances of the same job
             'max_instances': 1,  # Only allow one instance of each job to run at a time
             'misfire_grace_time': 300  # Allow 5 minutes grace time for delayed execution
         }
         
-        scheduler = BackgroundScheduler(
+        self.scheduler = BackgroundScheduler(
             executors=executors,
-            job_defaults=job_defaults
+            job_defaults=self.job_defaults
+        )
+        self.scheduler.add_listener(self._on_job_missed, EVENT_JOB_MISSED)
+    
+    @property
+    def running(self):
+        return self.scheduler.running
+    
+    def get_jobs(self):
+        return self.scheduler.get_jobs()
+    
+    def start(self):
+        """Schedule the jobs for the current configuration and start the scheduler"""
+        with self._lock:
+            self._sync_jobs()
+            self._sync_outbox_worker()
+        self._schedule_catch_up()
+        self.scheduler.start()
+        logger.info("News email scheduler started successfully")
+        return self
+    
+    def _schedule_catch_up(self):
+        """Queue one combined digest for daily sends missed while the app was not running"""
+        hour, minute = _parse_send_time(self.config.get('send_time', '07:00'))
+        missed = missed_daily_slots(
+            get_run_ledger(self.config).last_completed('daily_news_email'), hour, minute,
+            max_days=self.config.get('catchup_max_days', 7)
         )
+        if not missed:
+            return
+        logger.warning(f"Missed {len(missed)} daily digest(s) since {missed[0]:%Y-%m-%d} - scheduling a catch-up")
+        self.scheduler.add_job(self._catch_up_job, 'date', run_date=datetime.now(), args=[missed],
+                               id='news_catch_up', name='Missed Digest Catch-up', replace_existing=True)
+    
+    def _on_job_missed(self, event):
+        """A send dropped past misfire_grace_time, e.g. while the machine slept, is caught up at once"""
+        if event.job_id != 'daily_news_email':
+            return
+        logger.warning(f"Daily digest for {event.scheduled_run_time:%Y-%m-%d %H:%M} missed while the app was running")
+        try:
+            self._schedule_catch_up()
+        except Exception as e:
+            logger.error(f"Scheduling the catch-up digest failed: {e}", exc_info=True)
+    
+    def shutdown(self, wait=True):
+        self.scheduler.shutdown(wait=wait)
+        if self.outbox_worker is not None:
+            self.outbox_worker.stop()
+            self.outbox_worker = None
+    
+    def _sync_outbox_worker(self):
+        """Start the outbox delivery worker when the outbox is in use; caller holds the lock"""
+        if self.config.get('delivery_backend', 'outbox') != 'outbox':
+            return
+        if self.outbox_worker is None:
+            self.outbox_worker = OutboxWorker(self.config).start()
+        else:
+            self.outbox_worker.update_config(self.config)
+    
+    def _send_digest(self, config, message, key):
+        """Queue a rendered digest in the outbox, or send it now with the inline backend"""
+        if config.get('delivery_backend', 'outbox') != 'outbox':
+            _deliver_digest(config, message)
+            return
+        queued = _queue_digest(config, message, key)
+        if self.outbox_worker is not None:
+            self.outbox_worker.wake()
+        logger.info(f"Queued {queued} digest(s) for delivery")
+    
+    def update_config(self, config):
+        """
+        Swap in a new configuration without restarting the scheduler
         
-        def news_email_job():
-            """Job function to fetch news and send email"""
-            job_start_time = datetime.now()
-            logger.info(f"Starting scheduled news email job at {job_start_time}")
+        Args:
+            config (dict): The new configuration
             
-            try:
-                # Check if email is configured
-                if not config.get('email') or not config.get('smtp_username'):
-                    logger.warning("Email not configured - skipping news email job")
-                    return
-                
+        Raises:
+            ValueError: If the new send_time is invalid; the old configuration stays active
+        """
+        _parse_send_time(config.get('send_time', '07:00'))
+        with self._lock:
+            old_config, self.config = self.config, dict(config)
+            # A digest prefetched for the old settings must not be sent
+            if any(old_config.get(key) != config.get(key) for key in
+                   ('send_time', 'sources', 'keywords', 'email', 'recipients', 'smtp_username')):
+                digest_cache.clear()
+            self._sync_jobs()
+            self._sync_outbox_worker()
+        logger.info("Scheduler configuration updated")
+    
+    def _desired_jobs(self):
+        """Job id -> (function, trigger type, trigger arguments, name) for self.config"""
+        hour, minute = _parse_send_time(self.config.get('send_time', '07:00'))
+        jobs = {
+            'daily_news_email': (self._news_email_job, 'cron', {'hour': hour, 'minute': minute},
+                                 'Daily UPSC News Email')
+        }
+        
+        prefetch_lead = self.config.get('prefetch_lead_minutes', 15)
+        if prefetch_lead > 0:
+            prefetch_at = datetime(2000, 1, 2, hour, minute) - timedelta(minutes=prefetch_lead)
+            jobs['daily_news_prefetch'] = (self._news_prefetch_job, 'cron',
+                                           {'hour': prefetch_at.hour, 'minute': prefetch_at.minute},
+                                           'Daily UPSC News Prefetch')
+        
+        poll_interval = self.config.get('poll_interval_minutes', 30)
+        if poll_interval > 0:
+            jobs['news_poll'] = (self._news_poll_job, 'interval', {'minutes': poll_interval},
+                                 'Intraday News Poll')
+        return jobs
+    
+    def _sync_jobs(self):
+        """Add, reschedule or remove jobs so they match self.config; caller holds the lock"""
+        desired = self._desired_jobs()
+        
+        for job_id in list(self._job_specs):
+            if job_id not in desired:
+                self.scheduler.remove_job(job_id)
+                del self._job_specs[job_id]
+                logger.info(f"Removed job {job_id}")
+        
+        for job_id, (func, trigger, trigger_args, name) in desired.items():
+            spec = (trigger, trigger_args)
+            current = self._job_specs.get(job_id)
+            if current == spec:
+                continue
+            if current is None:
+                extra = {'next_run_time': datetime.now()} if trigger == 'interval' else {}
+                self.scheduler.add_job(func, trigger, id=job_id, name=name, replace_existing=True,
+                                       **trigger_args, **extra)
+                logger.info(f"Scheduled job {job_id}: {trigger} {trigger_args}")
+            else:
+                self.scheduler.reschedule_job(job_id, trigger=trigger, **trigger_args)
+                logger.info(f"Rescheduled job {job_id}: {trigger} {trigger_args}")
+            self._job_specs[job_id] = spec
+    
+    def _news_poll_job(self):
+        """Job function to archive articles published since the last poll"""
+        run = JobRun('news_poll')
+        outcome = "error"
+        try:
+            with run.stage("poll"):
+                run.items = poll_sources(self.config)
+            outcome = "success"
+        except Exception as e:
+            logger.error(f"News poll job failed: {e}", exc_info=True)
+        finally:
+            self.history.record(run, outcome)
+    
+    def _news_prefetch_job(self):
+        """Job function to fetch and render the digest ahead of send_time"""
+        config = self.config
+        if not _email_configured(config):
+            return
+        run = JobRun('daily_news_prefetch')
+        outcome = "error"
+        try:
+            hour, minute = _parse_send_time(config.get('send_time', '07:00'))
+            digest = prefetch_digest(config, _next_send_at(hour, minute), run)
+            run.items = len(digest.news_items) if digest else 0
+            outcome = "success" if digest else "empty"
+        except Exception as e:
+            logger.error(f"News prefetch job failed, the send job will fetch live: {e}", exc_info=True)
+        finally:
+            self.history.record(run, outcome)
+    
+    def _catch_up_job(self, missed):
+        """
+        Job function to send one digest covering every missed daily send
+        
+        The digest is the archive from 24 hours before the first missed send until
+        now, so N missed days cost one query rather than N scrapes.
+        """
+        config = self.config
+        ledger = get_run_ledger(config)
+        run_id = ledger.start('daily_news_email', missed[-1])
+        run = JobRun('news_catch_up')
+        outcome, news_items = "error", []
+        try:
+            if not _email_configured(config):
+                outcome = "skipped"
+                return
+            hours = (datetime.now() - missed[0]).total_seconds() / 3600 + 24
+            with run.stage("collect"):
+                news_items = (_archived_items(_fetch_config(config), hours)
+                              if config.get('poll_interval_minutes', 30) > 0 else [])
+                if not news_items:
+                    news_items = collect_digest_items(config)
+            if not news_items:
+                outcome = "empty"
+                return
+            if len(missed) > 1:
+                subject = f"UPSC News Digest - {missed[0]:%d %B} to {missed[-1]:%d %B %Y} (catch-up)"
+            else:
+                subject = f"Daily UPSC News Digest - {missed[0]:%d %B %Y} (catch-up)"
+            with run.stage("render"):
+                msg = _render_digest(config, news_items, subject=subject)
+            with run.stage("deliver"):
+                self._send_digest(config, msg, f"news_catch_up:{missed[0]:%Y-%m-%d}:{missed[-1]:%Y-%m-%d}")
+            outcome = "success"
+            logger.info(f"Catch-up digest with {len(news_items)} items sent for {len(missed)} missed day(s)")
+        except Exception as e:
+            logger.error(f"Catch-up digest failed: {e}", exc_info=True)
+        finally:
+            ledger.finish(run_id, outcome, items=len(news_items),
+                          detail=f"catch-up of {len(missed)} missed send(s) from {missed[0]:%Y-%m-%d}")
+            run.items = len(news_items)
+            self.history.record(run, outcome)
+    
+    def _news_email_job(self):
+        """Job function to send the prefetched digest, fetching live if there is none"""
+        config = self.config
+        job_start_time = datetime.now()
+        logger.info(f"Starting scheduled news email job at {job_start_time}")
+        outcome = "error"
+        news_items = []
+        hour, minute = _parse_send_time(config.get('send_time', '07:00'))
+        slot = _next_send_at(hour, minute, job_start_time - timedelta(seconds=self.job_defaults['misfire_grace_time']))
+        ledger = get_run_ledger(config)
+        run_id = ledger.start('daily_news_email', slot)
+        run = JobRun('daily_news_email')
+        
+        try:
+            # Check if email is configured
+            if not _email_configured(config):
+                logger.warning("Email not configured - skipping news email job")
+                outcome = "skipped"
+                return
+            
+            with run.stage("cache"):
+                digest = digest_cache.take(job_start_time, max_skew_seconds=self.job_defaults['misfire_grace_time'] + 60)
+            if digest is not None:
+                news_items, msg = digest.news_items, digest.message
+                logger.info(f"Using digest prefetched at {digest.prepared_at:%H:%M:%S}")
+            else:
                 # Fetch news
-                logger.info("Fetching UPSC news...")
-                news_items = get_upsc_news(config)
+                logger.info("No prefetched digest - fetching UPSC news...")
+                with run.stage("collect"):
+                    news_items = collect_digest_items(config)
                 
                 if not news_items:
                     logger.warning("No news items found matching keywords")
+                    outcome = "empty"
                     return
-                
-                logger.info(f"Found {len(news_items)} news items, sending email...")
-                
-                # Send email
-                send_news_email(config, news_items)
-                
-                job_duration = datetime.now() - job_start_time
-                logger.info(f"News email job completed successfully in {job_duration.total_seconds():.2f} seconds")
-                
-            except Exception as e:
-                logger.error(f"News email job failed: {e}", exc_info=True)
-                # Don't re-raise to prevent scheduler from stopping
-        
-        # Add the job
-        job = scheduler.add_job(
-            news_email_job,
-            'cron',
-            hour=hour,
-            minute=minute,
-            id='daily_news_email',
-            name='Daily UPSC News Email',
-            replace_existing=True
-        )
-        
-        logger.info(f"Scheduled daily news email job for {send_time} (Job ID: {job.id})")
-        
-        # Start scheduler
-        scheduler.start()
-        logger.info("News email scheduler started successfully")
+                with run.stage("render"):
+                    msg = _render_digest(config, news_items, job_start_time)
+            
+            logger.info(f"Sending email with {len(news_items)} news items...")
+            
+            # Send email, or hand it to the outbox worker
+            with run.stage("deliver"):
+                self._send_digest(config, msg, f"daily_news_email:{slot:%Y-%m-%d %H:%M}")
+            
+            outcome = "success"
+            job_duration = datetime.now() - job_start_time
+            logger.info(f"News email job completed successfully in {job_duration.total_seconds():.2f} seconds")
+            
+        except Exception as e:
+            logger.error(f"News email job failed: {e}", exc_info=True)
+            # Don't re-raise to prevent scheduler from stopping
+        finally:
+            NEWS_EMAIL_JOB_SECONDS.observe((datetime.now() - job_start_time).total_seconds(), outcome=outcome)
+            ledger.finish(run_id, outcome, items=len(news_items))
+            run.items = len(news_items)
+            self.history.record(run, outcome)
+
+def schedule_daily_email(config):
+    """
+    Set up a background scheduler for daily news email delivery
+    
+    Args:
+        config (dict): Configuration containing send_time and other settings
         
-        return scheduler
+    Returns:
+        NewsSchedulerService: Configured and started scheduler service
         
+    Raises:
+        ValueError: If configuration is invalid
+        Exception: If scheduler fails to start
+    """
+    try:
+        return NewsSchedulerService(config).start()
     except Exception as e:
         logger.error(f"Failed to create scheduler: {e}")
         raise
@@ -113,10 +524,11 @@ def get_scheduler_status(scheduler):
     Get current status of the scheduler and jobs
     
     Args:
-        scheduler: The BackgroundScheduler instance
+        scheduler: The NewsSchedulerService (or a BackgroundScheduler)
         
     Returns:
-        dict: Status information about scheduler and jobs
+        dict: Status information about scheduler and jobs, with p50/p95/p99
+            durations and failure rate per job when run history is available
     """
     if not scheduler:
         return {"status": "not_initialized"}
@@ -124,20 +536,28 @@ def get_scheduler_status(scheduler):
     try:
         jobs = scheduler.get_jobs()
         job_info = []
+        history = getattr(scheduler, 'history', None)
         
         for job in jobs:
             next_run = job.next_run_time
-            job_info.append({
+            info = {
                 "id": job.id,
                 "name": job.name,
                 "next_run": next_run.isoformat() if next_run else None,
                 "trigger": str(job.trigger)
-            })
+            }
+            if history:
+                info["stats"] = history.stats(job.id)
+            job_info.append(info)
         
         return {
             "status": "running" if scheduler.running else "stopped",
             "jobs": job_info,
-            "job_count": len(jobs)
+            "job_count": len(jobs),
+            "history": history.summary() if history else {},
+            "outbox": get_outbox(scheduler.config).counts() if getattr(scheduler, 'outbox_worker', None) else {},
+            "outbox_dead": (get_outbox(scheduler.config).dead_messages()
+                            if getattr(scheduler, 'outbox_worker', None) else [])
         }
         
     except Exception as e:
@@ -0,0 +1,98 @@
+import logging
+import threading
+import time
+
+from metrics import record_cache_lookup
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class FlightTimeout(TimeoutError):
+    """Raised to a waiting caller when the in-flight call does not finish within its timeout"""
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one execution
+
+    The first caller for a key runs the function; callers arriving while it is in
+    flight wait for and share its result (or exception). Successful results are
+    kept for ttl seconds so callers shortly afterwards get them without running
+    the function again. Failures are never cached.
+    """
+    def __init__(self, name, ttl=0):
+        self.name = name
+        self.ttl = ttl
+        self._calls = {}
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, ttl=None, timeout=None):
+        """
+        Return fn()'s result for key, sharing in-flight and recent results
+
+        Args:
+            key: Hashable key identifying the work
+            fn (callable): Function to run if no result is in flight or cached
+            ttl (float): Seconds to keep a successful result; defaults to the instance ttl
+            timeout (float): Longest a caller waits for another caller's fn, or None
+                to wait for it to finish; the caller running fn is not limited
+
+        Returns:
+            tuple: (result, shared) where shared is False only for the caller that ran fn
+
+        Raises:
+            FlightTimeout: If the shared call did not finish within timeout
+        """
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and time.monotonic() < cached[0]:
+                record_cache_lookup(self.name, True)
+                return cached[1], True
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        record_cache_lookup(self.name, not leader)
+        if not leader:
+            if not call.done.wait(timeout):
+                raise FlightTimeout(f"{self.name}: shared call still running after {timeout:.1f}s")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and ttl > 0:
+                    self._results[key] = (time.monotonic() + ttl, call.result)
+                self._prune()
+            call.done.set()
+        return call.result, False
+
+    def _prune(self):
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._results.items() if now >= expires_at]
+        for key in expired:
+            del self._results[key]
+
+    def forget(self, key=None):
+        """Drop the cached result for a key, or for every key"""
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
@@ -0,0 +1,205 @@
+import logging
+import smtplib
+import threading
+
+from metrics import SMTP_CONNECTIONS, SMTP_PHASE_SECONDS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Errors after which the connection is assumed dead and the send is retried once
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+class _SMTP(smtplib.SMTP):
+    """smtplib.SMTP that notes when a transaction reaches DATA"""
+    data_started = False
+
+    def data(self, msg):
+        self.data_started = True
+        return super().data(msg)
+
+class SMTPConnectionManager:
+    """
+    Keeps one authenticated SMTP connection open between sends
+
+    The connection (connect, STARTTLS, login) is made on first use and reused for
+    every message until it has been idle for idle_seconds, when a timer closes
+    it. If the server has dropped the connection in the meantime, the send is
+    retried once on a fresh connection - but only when the failure came before
+    DATA, since after that the server may already have accepted the message.
+    Sends are serialised, because an SMTP session carries one transaction at a
+    time.
+    """
+    def __init__(self, server, port, username, password, idle_seconds=60, timeout=30, ssl_context=None):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self.connections_opened = 0
+        self._smtp = None
+        self._idle_timer = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config['smtp_server'], config['smtp_port'], config['smtp_username'], config['smtp_password'],
+            idle_seconds=config.get('smtp_idle_seconds', 60),
+            timeout=config.get('smtp_timeout_seconds', 30)
+        )
+
+    def _connect(self):
+        with SMTP_PHASE_SECONDS.time(phase="connect"):
+            smtp = _SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            # Enable security
+            with SMTP_PHASE_SECONDS.time(phase="tls"):
+                smtp.starttls(context=self.ssl_context)
+            
+            # Login
+            with SMTP_PHASE_SECONDS.time(phase="auth"):
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.connections_opened += 1
+        SMTP_CONNECTIONS.inc()
+        logger.debug(f"Opened SMTP connection to {self.server}:{self.port}")
+        return smtp
+
+    def _connection(self):
+        if self._smtp is None:
+            self._smtp = self._connect()
+        return self._smtp
+
+    def _discard(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.close()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def _touch(self):
+        """Restart the idle timer after a use; idle_seconds None leaves closing to the caller"""
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+        if self.idle_seconds is None:
+            return
+        if self.idle_seconds > 0:
+            self._idle_timer = threading.Timer(self.idle_seconds, self.close)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+        else:
+            self.close()
+
+    def _transaction(self, msg):
+        """MAIL, RCPT and DATA for one message on the current connection"""
+        smtp = self._connection()
+        smtp.data_started = False
+        with SMTP_PHASE_SECONDS.time(phase="data"):
+            smtp.send_message(msg)
+
+    def send(self, msg):
+        """
+        Send one message, reconnecting once if the connection was dropped before DATA
+
+        Raises:
+            smtplib.SMTPException: If sending fails on a fresh connection too, or
+                the connection failed once DATA had started
+        """
+        with self._lock:
+            try:
+                try:
+                    self._transaction(msg)
+                except RECONNECT_ERRORS as e:
+                    if self._smtp is not None and self._smtp.data_started:
+                        # Resending could deliver the message twice
+                        raise
+                    logger.info(f"SMTP connection lost ({e}), reconnecting")
+                    self._discard()
+                    self._transaction(msg)
+            except Exception:
+                # A failed transaction can leave the session in an unknown state
+                self._discard()
+                raise
+            finally:
+                self._touch()
+
+    def send_batch(self, messages):
+        """
+        Send messages over the shared connection
+
+        Returns:
+            list: None for each message sent, or the exception it failed with
+        """
+        results = []
+        with self._lock:
+            for msg in messages:
+                try:
+                    self.send(msg)
+                    results.append(None)
+                except Exception as e:
+                    logger.error(f"Failed to send message to {msg['To']}: {e}")
+                    results.append(e)
+        return results
+
+    def check(self):
+        """Make sure an authenticated connection can be made, reusing an open one"""
+        with self._lock:
+            try:
+                smtp = self._connection()
+                code, _ = smtp.noop()
+                if code != 250:
+                    raise smtplib.SMTPServerDisconnected(f"NOOP returned {code}")
+            except RECONNECT_ERRORS:
+                self._discard()
+                self._connection()
+            finally:
+                self._touch()
+
+    def close(self):
+        """Quit the connection if one is open"""
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            if self._smtp is not None:
+                try:
+                    self._smtp.quit()
+                except Exception:
+                    pass
+                self._smtp = None
+                logger.debug(f"Closed idle SMTP connection to {self.server}:{self.port}")
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+def get_smtp_manager(config):
+    """
+    Return the process-wide connection manager for the configured account
+
+    Managers are keyed by server, port, credentials and connection settings, so
+    testing new settings never reuses a connection opened with the old ones.
+
+    Returns:
+        SMTPConnectionManager: Shared manager
+    """
+    key = (config['smtp_server'], config['smtp_port'], config['smtp_username'], config['smtp_password'],
+           config.get('smtp_idle_seconds', 60), config.get('smtp_timeout_seconds', 30))
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = SMTPConnectionManager.from_config(config)
+            _managers[key] = manager
+        return manager
+
+def close_smtp_connections():
+    """Close every open managed connection, e.g. at shutdown"""
+    with _managers_lock:
+        managers = list(_managers.values())
+    for manager in managers:
+        manager.close()
@@ -0,0 +1,113 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from news_scraper import create_session, get_all_source_urls
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+MAX_PROBE_BYTES = 2 * 1024 * 1024
+
+def probe_url(url, timeout=10):
+    """
+    Probe a URL with HEAD, falling back to a capped streaming GET
+
+    The latency is the time until the response headers arrive with either
+    method, so samples stay comparable when a site stops answering HEAD; the
+    GET body is only read to measure its size.
+
+    Args:
+        url (str): URL to probe
+        timeout (float): Per-request timeout in seconds
+
+    Returns:
+        dict: latency (seconds), status_code, content_length, ok and error
+    """
+    session = create_session(retries=0)
+    start = time.perf_counter()
+    try:
+        response = session.head(url, timeout=timeout, allow_redirects=True)
+        content_length = int(response.headers.get('Content-Length') or 0)
+        if response.status_code >= 400 or not content_length:
+            # Many news sites reject HEAD or omit the length; read the body instead
+            start = time.perf_counter()
+            response = session.get(url, timeout=timeout, allow_redirects=True, stream=True)
+            latency = time.perf_counter() - start
+            content_length = 0
+            for chunk in response.iter_content(chunk_size=65536):
+                content_length += len(chunk)
+                if content_length >= MAX_PROBE_BYTES:
+                    break
+            response.close()
+        else:
+            latency = time.perf_counter() - start
+        response.raise_for_status()
+        return {
+            "latency": latency,
+            "status_code": response.status_code,
+            "content_length": content_length,
+            "ok": True,
+            "error": None
+        }
+    except requests.exceptions.RequestException as e:
+        status_code = e.response.status_code if getattr(e, 'response', None) is not None else None
+        return {
+            "latency": time.perf_counter() - start,
+            "status_code": status_code,
+            "content_length": 0,
+            "ok": False,
+            "error": str(e)
+        }
+    finally:
+        session.close()
+
+def probe_sources(sources=None, history=None, max_workers=8, timeout=10, timeouts=None, limiter=None):
+    """
+    Probe news sources concurrently and record the results
+
+    Sources that share a URL are probed once and the result is recorded for each.
+
+    Args:
+        sources (dict): Mapping of source name to URL; defaults to every known source
+        history (LatencyHistory): Optional history to record samples into
+        max_workers (int): Maximum concurrent probes
+        timeout (float): Per-request timeout in seconds when no adaptive timeouts are given
+        timeouts (AdaptiveTimeouts): Optional per-host timeouts learned from history
+        limiter (HostRateLimiter): Optional shared per-host rate limiter
+
+    Returns:
+        dict: Probe result per source name
+    """
+    if sources is None:
+        sources = get_all_source_urls()
+
+    names_by_url = {}
+    for name, url in sources.items():
+        names_by_url.setdefault(url, []).append(name)
+
+    def probe(url):
+        if limiter is not None:
+            limiter.acquire(url)
+        return probe_url(url, timeouts.timeout_for(url) if timeouts else timeout)
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names_by_url)))) as executor:
+        futures = {executor.submit(probe, url): url for url in names_by_url}
+        for future in as_completed(futures):
+            url = futures[future]
+            result = future.result()
+            for name in names_by_url[url]:
+                results[name] = dict(result, url=url)
+                if history is not None:
+                    history.record(name, url, result["latency"], result["status_code"],
+                                   result["content_length"], result["ok"], result["error"], kind="probe")
+
+    if history is not None:
+        history.save()
+
+    healthy = sum(1 for result in results.values() if result["ok"])
+    logger.info(f"Source health probe: {healthy}/{len(results)} sources healthy")
+    return results
@@ -7,10 +7,18 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QIcon, QFont, QPixmap, QPainter, QPen, QColor
 from PyQt5.QtCore import QTimer, pyqtSignal, QThread, pyqtSignal as Signal, Qt
 from config import load_config, save_config
-from scheduler import schedule_daily_email, get_scheduler_status
+from scheduler import NewsSchedulerService, get_scheduler_status
 from ui.settings_dialog import SettingsDialog
-from news_scraper import get_upsc_news, get_weekly_news, get_monthly_news, generate_upsc_questions
-from email_manager import send_news_email
+from news_scraper import fetch_upsc_news, get_weekly_news, get_monthly_news, generate_upsc_questions
+from email_manager import send_news_email_async
+from smtp_connection import close_smtp_connections
+from async_delivery import close_delivery_loop
+from metrics import start_metrics_from_config
+from source_health import probe_sources
+from latency_history import get_latency_history
+from adaptive_timeouts import AdaptiveTimeouts
+from rate_limiter import get_rate_limiter
+from circuit_breaker import get_breaker_registry
 import logging
 from datetime import datetime
 
@@ -120,12 +128,38 @@ class TypewriterTextEdit(QTextEdit):
             }
         """)
 
+class SourceHealthWorker(QThread):
+    """Background thread that probes every news source and records latency history"""
+    probe_finished = pyqtSignal(dict)
+    
+    def __init__(self, history, timeouts=None, limiter=None, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.timeouts = timeouts
+        self.limiter = limiter
+        
+    def run(self):
+        try:
+            results = probe_sources(history=self.history, timeouts=self.timeouts, limiter=self.limiter)
+        except Exception as e:
+            logger.error(f"Source health probe failed: {e}")
+            results = {}
+        self.probe_finished.emit(results)
+
 class MainWindow(QMainWindow):
+    # Carries a finished test-email future from the delivery loop to the GUI thread
+    email_test_finished = pyqtSignal(object)
+    
     def __init__(self):
         super().__init__()
         self.config = load_config()
         self.scheduler = None
         self.last_news_items = []
+        self.last_run_report = None
+        self.metrics_server = start_metrics_from_config(self.config)
+        self.health_history = get_latency_history(self.config)
+        self.health_worker = None
+        self.email_test_finished.connect(self.on_email_test_finished)
         self.init_ui()
         self.start_scheduler()
         self.update_status_display()
@@ -135,6 +169,14 @@ class MainWindow(QMainWindow):
         self.status_timer.timeout.connect(self.update_status_display)
         self.status_timer.start(30000)  # 30 seconds
         
+        # Probe source health in the background shortly after startup, then periodically
+        self.health_timer = QTimer()
+        self.health_timer.timeout.connect(self.refresh_source_health)
+        health_interval = self.config.get('source_health_interval_minutes', 5)
+        if health_interval:
+            self.health_timer.start(int(health_interval * 60 * 1000))
+            QTimer.singleShot(2000, self.refresh_source_health)
+        
     def init_ui(self):
         self.setWindowTitle("📰 UPSC News Aggregator - Daily Herald")
         # Set window to larger size to accommodate header
@@ -380,6 +422,32 @@ class MainWindow(QMainWindow):
         status_group.setLayout(status_layout)
         left_layout.addWidget(status_group)
         
+        # Source Health
+        health_group = QGroupBox("🩺 SOURCE HEALTH")
+        health_group.setStyleSheet(controls_group.styleSheet())
+        health_layout = QVBoxLayout()
+        
+        self.source_health_label = QLabel("Awaiting first probe...")
+        self.source_health_label.setWordWrap(True)
+        self.source_health_label.setStyleSheet("""
+            padding: 10px;
+            background-color: #f8f5f0;
+            border: 1px solid #d0d0d0;
+            border-radius: 5px;
+            font-family: 'Courier New', monospace;
+            font-size: 10px;
+            color: #2c3e50;
+        """)
+        health_layout.addWidget(self.source_health_label)
+        
+        probe_btn = QPushButton("🩺 PROBE SOURCES")
+        probe_btn.setStyleSheet(button_style)
+        probe_btn.clicked.connect(self.refresh_source_health)
+        health_layout.addWidget(probe_btn)
+        
+        health_group.setLayout(health_layout)
+        left_layout.addWidget(health_group)
+        
         # Activity Log
         log_group = QGroupBox("📜 NEWSROOM LOG")
         log_group.setStyleSheet(controls_group.styleSheet())
@@ -964,14 +1032,24 @@ class MainWindow(QMainWindow):
                 if scheduler_status.get('status') == 'running':
                     jobs = scheduler_status.get('jobs', [])
                     if jobs:
-                        next_run = jobs[0].get('next_run')
+                        # Prefer the daily email job over the prefetch and poll jobs
+                        email_job = next((job for job in jobs if job['id'] == 'daily_news_email'), jobs[0])
+                        next_run = email_job.get('next_run')
+                        stats = email_job.get('stats') or {}
+                        stats_str = ""
+                        if stats.get('runs'):
+                            stats_str = (f" · p50 {stats['p50']:.1f}s p95 {stats['p95']:.1f}s p99 {stats['p99']:.1f}s"
+                                         f" · {stats['failure_rate']:.0%} FAILED")
+                        dead = scheduler_status.get('outbox_dead') or []
+                        if dead:
+                            stats_str += f" · {len(dead)} UNDELIVERED (python -m gyan outbox --requeue)"
                         if next_run:
                             from datetime import datetime
                             next_run_dt = datetime.fromisoformat(next_run.replace('Z', '+00:00'))
                             next_run_str = next_run_dt.strftime('%Y-%m-%d %H:%M:%S')
-                            self.scheduler_status_label.setText(f"📅 SCHEDULER: RUNNING (NEXT: {next_run_str})")
+                            self.scheduler_status_label.setText(f"📅 SCHEDULER: RUNNING (NEXT: {next_run_str}){stats_str}")
                         else:
-                            self.scheduler_status_label.setText("📅 SCHEDULER: RUNNING")
+                            self.scheduler_status_label.setText(f"📅 SCHEDULER: RUNNING{stats_str}")
                     else:
                         self.scheduler_status_label.setText("📅 SCHEDULER: RUNNING (NO JOBS)")
                 else:
@@ -1005,17 +1083,48 @@ class MainWindow(QMainWindow):
         else:
             self.create_default_news_message()
             
+    def refresh_source_health(self):
+        """Start a background probe of all sources unless one is already running"""
+        if self.health_worker and self.health_worker.isRunning():
+            return
+        timeouts = AdaptiveTimeouts.from_config(self.health_history, self.config, default_timeout=10)
+        self.health_worker = SourceHealthWorker(self.health_history, timeouts, get_rate_limiter(self.config), self)
+        self.health_worker.probe_finished.connect(self.on_source_health_probed)
+        self.health_worker.start()
+        
+    def on_source_health_probed(self, results):
+        """Render probe results and latency percentiles in the Source Health panel"""
+        lines = []
+        breaker_states = get_breaker_registry(self.config).states()
+        for name in sorted(results):
+            result = results[name]
+            stats = self.health_history.stats(name, kind="probe")
+            state = "OK " if result['ok'] else "ERR"
+            p50 = f"{stats['p50'] * 1000:.0f}" if stats['p50'] is not None else "-"
+            p95 = f"{stats['p95'] * 1000:.0f}" if stats['p95'] is not None else "-"
+            circuit = breaker_states.get(name, "closed")
+            circuit = "" if circuit == "closed" else f" [{circuit.upper()}]"
+            lines.append(f"{state} {name[:22]:<22} p50 {p50:>5}ms p95 {p95:>5}ms {result['content_length'] // 1024}KB{circuit}")
+        if lines:
+            self.source_health_label.setText("\n".join(lines))
+            healthy = sum(1 for result in results.values() if result['ok'])
+            self.log_message(f"🩺 Source health: {healthy}/{len(results)} sources responding")
+        else:
+            self.source_health_label.setText("No probe results available")
+            
     def clear_log(self):
         """Clear the activity log"""
         self.log_display.clear()
         self.log_message("📜 Newsroom log cleared")
         
     def start_scheduler(self):
-        """Start the news scheduler"""
+        """Start the news scheduler, or apply the current config to the running one"""
         try:
             if self.scheduler:
-                self.scheduler.shutdown()
-            self.scheduler = schedule_daily_email(self.config)
+                self.scheduler.update_config(self.config)
+                self.log_message("📅 News scheduler updated with new settings")
+                return
+            self.scheduler = NewsSchedulerService(self.config).start()
             self.log_message("📅 News scheduler started - Telegraph system operational")
             logger.info("Scheduler started successfully")
         except Exception as e:
@@ -1028,8 +1137,10 @@ class MainWindow(QMainWindow):
             self.log_message("📰 Fetching latest headlines from news sources...")
             self.status_bar.showMessage("📡 Connecting to news wire services...")
             
-            news_items = get_upsc_news(self.config)
+            news_items, report = fetch_upsc_news(self.config)
             self.last_news_items = news_items
+            self.last_run_report = report
+            self.log_run_report(report)
             
             if news_items:
                 message = f"✅ Successfully fetched {len(news_items)} headlines from the wire"
@@ -1053,6 +1164,16 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "📰 News Fetch Failed", f"Error retrieving news: {str(e)}")
             self.status_bar.showMessage("📰 Ready to deliver the news...")
             
+    def log_run_report(self, report):
+        """Write per-source timings from a scrape run to the activity log"""
+        self.log_message(f"⏱️ Wire report: {report.summary()}")
+        for timing in report.sources.values():
+            details = timing.to_dict()
+            stages = ", ".join(f"{name} {ms:.0f}ms" for name, ms in details['stages_ms'].items())
+            breaker = f" [circuit {timing.breaker_state}]" if timing.breaker_state not in (None, "closed") else ""
+            self.log_message(f"   {timing.source.upper()}: {timing.status.upper()}{breaker} "
+                             f"{details['bytes_received'] // 1024}KB - {stages}")
+            
     def test_email(self):
         """Test email functionality"""
         try:
@@ -1071,19 +1192,31 @@ class MainWindow(QMainWindow):
                 'link': 'https://example.com'
             }]
             
-            send_news_email(self.config, test_news)
+            # Sent from the delivery loop, so the window stays responsive meanwhile
+            future = send_news_email_async(self.config, test_news)
+            future.add_done_callback(self.email_test_finished.emit)
+            
+        except Exception as e:
+            error_msg = f"❌ Telegraph test failed: {e}"
+            self.log_message(error_msg)
+            QMessageBox.critical(self, "📧 Telegraph Test Failed", 
+                               f"Telegraph system error: {str(e)}")
+            self.status_bar.showMessage("📰 Ready to deliver the news...")
+        
+    def on_email_test_finished(self, future):
+        """Report the outcome of a test email started by test_email"""
+        try:
+            future.result()
             message = "✅ Test telegraph message sent successfully!"
             self.log_message(message)
             QMessageBox.information(self, "📧 Telegraph Test Successful", 
                                   "Test message delivered successfully via telegraph system.")
-            self.status_bar.showMessage("📰 Ready to deliver the news...")
-            
         except Exception as e:
             error_msg = f"❌ Telegraph test failed: {e}"
             self.log_message(error_msg)
             QMessageBox.critical(self, "📧 Telegraph Test Failed", 
                                f"Telegraph system error: {str(e)}")
-            self.status_bar.showMessage("📰 Ready to deliver the news...")
+        self.status_bar.showMessage("📰 Ready to deliver the news...")
         
     def show_settings(self):
         """Show settings dialog"""
@@ -1094,10 +1227,8 @@ class MainWindow(QMainWindow):
                 self.config = dialog.get_updated_config()
                 save_config(self.config)
                 
-                # Restart scheduler if schedule settings changed
-                if (old_config.get('send_time') != self.config.get('send_time') or
-                    old_config.get('sources') != self.config.get('sources') or
-                    old_config.get('keywords') != self.config.get('keywords')):
+                # The running scheduler picks up the new settings in place
+                if old_config != self.config:
                     self.start_scheduler()
                     
                 self.log_message("⚙️ Newsroom settings updated successfully")
@@ -1673,10 +1804,19 @@ class MainWindow(QMainWindow):
             if self.scheduler:
                 self.scheduler.shutdown()
                 logger.info("Scheduler stopped")
+            close_smtp_connections()
+            close_delivery_loop()
+            
+            if self.metrics_server:
+                self.metrics_server.shutdown()
             
             # Stop the status timer
             if hasattr(self, 'status_timer'):
                 self.status_timer.stop()
+            if hasattr(self, 'health_timer'):
+                self.health_timer.stop()
+            if self.health_worker and self.health_worker.isRunning():
+                self.health_worker.wait(2000)
             
             QApplication.quit()
             
@@ -3,14 +3,18 @@ from PyQt5.QtWidgets import (
     QTimeEdit, QListWidget, QListWidgetItem, QPushButton, 
     QGroupBox, QCheckBox, QMessageBox, QTextEdit, QSpinBox
 )
-from PyQt5.QtCore import QTime
+from PyQt5.QtCore import QTime, pyqtSignal
 from PyQt5.QtGui import QFont
 import copy
 
 class SettingsDialog(QDialog):
+    # Carries a finished test-email future from the delivery loop to the GUI thread
+    email_test_finished = pyqtSignal(object)
+    
     def __init__(self, config, parent=None):
         super().__init__(parent)
         self.config = copy.deepcopy(config)
+        self.email_test_finished.connect(self.on_email_test_finished)
         self.init_ui()
         self.load_config_values()
         
@@ -95,9 +99,9 @@ class SettingsDialog(QDialog):
         # Buttons
         button_layout = QHBoxLayout()
         
-        test_btn = QPushButton("Test Email")
-        test_btn.clicked.connect(self.test_email)
-        button_layout.addWidget(test_btn)
+        self.test_btn = QPushButton("Test Email")
+        self.test_btn.clicked.connect(self.test_email)
+        button_layout.addWidget(self.test_btn)
         
         button_layout.addStretch()
         
@@ -184,7 +188,7 @@ class SettingsDialog(QDialog):
         
     def test_email(self):
         """Test email configuration by sending a test email"""
-        from email_manager import send_news_email
+        from email_manager import send_news_email_async
         
         # Create temporary config with current settings
         test_config = {
@@ -208,7 +212,22 @@ class SettingsDialog(QDialog):
         }]
         
         try:
-            send_news_email(test_config, test_news)
+            future = send_news_email_async(test_config, test_news)
+        except Exception as e:
+            QMessageBox.critical(self, "Test Failed", 
+                               f"Failed to send test email:\n{str(e)}")
+            return
+        # The dialog stays responsive while the email is sent
+        self.test_btn.setEnabled(False)
+        self.test_btn.setText("Sending...")
+        future.add_done_callback(self.email_test_finished.emit)
+    
+    def on_email_test_finished(self, future):
+        """Report the outcome of a test email started by test_email"""
+        self.test_btn.setEnabled(True)
+        self.test_btn.setText("Test Email")
+        try:
+            future.result()
             QMessageBox.information(self, "Test Successful", 
                                   "Test email sent successfully! Check your inbox.")
         except Exception as e:
@@ -0,0 +1,285 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+WORK_QUEUE_FILE = "work_queue.db"
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch);
+"""
+
+class WorkQueue:
+    """
+    Leased work queue in a SQLite file, shared by a producer and any number of workers
+
+    Workers lease one job at a time. A lease that is not completed before it
+    expires, because the worker died or hung, puts the job back in the queue
+    for another worker, up to max_attempts leases. Any process that can open the
+    database file can take part, including workers on other hosts that share
+    the directory.
+    """
+    def __init__(self, path=WORK_QUEUE_FILE, lease_seconds=300, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # Autocommit mode; writes that must be atomic use BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def enqueue(self, sources, payload=None):
+        """
+        Add one job per source as a new batch
+
+        Returns:
+            str: The batch id
+        """
+        batch = uuid.uuid4().hex
+        now = time.time()
+        data = json.dumps(payload or {})
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO jobs (batch, position, source, payload, state, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                [(batch, position, source, data, QUEUED, now) for position, source in enumerate(sources)]
+            )
+            conn.execute("COMMIT")
+        return batch
+
+    def lease(self, owner):
+        """
+        Lease the oldest queued job, first re-queueing jobs whose lease expired
+
+        Returns:
+            dict: id, batch, source and payload of the leased job, or None if the queue is empty
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                expired = conn.execute(
+                    "SELECT id, source, lease_owner, attempts FROM jobs WHERE state = ? AND lease_expires < ?",
+                    (LEASED, now)
+                ).fetchall()
+                for job_id, source, lease_owner, attempts in expired:
+                    state = QUEUED if attempts < self.max_attempts else FAILED
+                    conn.execute(
+                        "UPDATE jobs SET state = ?, lease_owner = NULL, lease_expires = NULL, error = ?, updated = ? "
+                        "WHERE id = ?", (state, f"lease held by {lease_owner} expired", now, job_id)
+                    )
+                    logger.warning(f"Lease on {source} job {job_id} held by {lease_owner} expired - {state}")
+                row = conn.execute(
+                    "SELECT id, batch, source, payload FROM jobs WHERE state = ? ORDER BY id LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET state = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ?, "
+                        "updated = ? WHERE id = ?", (LEASED, owner, now + self.lease_seconds, now, row[0])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job_id, batch, source, payload = row
+        return {"id": job_id, "batch": batch, "source": source, "payload": json.loads(payload)}
+
+    def complete(self, job_id, owner, result):
+        """
+        Store a job's result; ignored if the lease was lost to another worker
+
+        Returns:
+            bool: True if the result was stored
+        """
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = ?, result = ?, error = NULL, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND state = ? AND lease_owner = ?",
+                (DONE, json.dumps(result), time.time(), job_id, LEASED, owner)
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, owner, error):
+        """Give a job back to the queue, or mark it failed after max_attempts leases"""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts < ? THEN ? ELSE ? END, error = ?, "
+                "lease_owner = NULL, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND state = ? AND lease_owner = ?",
+                (self.max_attempts, QUEUED, FAILED, str(error), time.time(), job_id, LEASED, owner)
+            )
+
+    def batch_counts(self, batch):
+        """Number of jobs in each state for a batch"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT state, COUNT(*) FROM jobs WHERE batch = ? GROUP BY state", (batch,)).fetchall()
+        return dict(rows)
+
+    def batch_results(self, batch):
+        """Results of a batch's completed jobs in enqueue order, as (source, result) pairs"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT source, result FROM jobs WHERE batch = ? AND state = ? ORDER BY position", (batch, DONE)
+            ).fetchall()
+        return [(source, json.loads(result)) for source, result in rows]
+
+    def wait_for_batch(self, batch, timeout, poll_interval=1.0):
+        """
+        Block until every job in the batch is done or failed
+
+        Returns:
+            bool: True if the batch drained before the timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            counts = self.batch_counts(batch)
+            if not counts.get(QUEUED) and not counts.get(LEASED):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+
+    def purge(self, older_than_seconds=7 * 86400):
+        """Delete finished jobs older than the given age"""
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM jobs WHERE state IN (?, ?) AND updated < ?",
+                         (DONE, FAILED, time.time() - older_than_seconds))
+
+def get_work_queue(config):
+    """Open the configured work queue"""
+    return WorkQueue(
+        config.get('work_queue_path', WORK_QUEUE_FILE),
+        lease_seconds=config.get('work_lease_seconds', 300),
+        max_attempts=config.get('work_max_attempts', 3)
+    )
+
+def _run_batch(config, payload):
+    """Enqueue one job per configured source and return the results that finished in time"""
+    queue = get_work_queue(config)
+    batch = queue.enqueue(config['sources'], payload)
+    logger.info(f"Queued {len(config['sources'])} sources as batch {batch}")
+    if not queue.wait_for_batch(batch, config.get('work_queue_wait_seconds', 600)):
+        logger.warning(f"Work queue batch {batch} did not drain in time: {queue.batch_counts(batch)}")
+    results = [result for source, result in queue.batch_results(batch)]
+    queue.purge()
+    return results
+
+def fetch_news_via_queue(config):
+    """
+    Fetch news by enqueueing one job per source and waiting for workers to drain them
+
+    Sources still unfinished after 'work_queue_wait_seconds' are left out, so
+    the caller gets partial results on time.
+
+    Args:
+        config (dict): Configuration; the producer's keywords travel with each job
+
+    Returns:
+        list: News items in configured source order
+    """
+    news_items = []
+    for result in _run_batch(config, {"keywords": config['keywords']}):
+        news_items.extend(result["items"])
+    return news_items
+
+def poll_news_via_queue(config, validators):
+    """
+    Poll sources through the workers, like news_scraper.poll_upsc_news
+
+    Each job carries the stored validators, so workers make conditional requests
+    and skip pages that have not changed.
+
+    Args:
+        config (dict): Configuration; the producer's keywords travel with each job
+        validators (dict): {url: {"etag": ..., "last_modified": ...}} from the last poll
+
+    Returns:
+        tuple: (list of news items, updated validators dict)
+    """
+    news_items = []
+    updated = dict(validators)
+    for result in _run_batch(config, {"keywords": config['keywords'], "validators": validators}):
+        news_items.extend(result["items"])
+        updated.update(result.get("validators") or {})
+    return news_items, updated
+
+def run_worker(config, worker_id=None, stop=None, idle_seconds=2.0):
+    """
+    Lease, fetch and complete jobs until stop is set
+
+    Each job is fetched through the normal scraping pipeline for that one source,
+    so breakers, rate limits and adaptive timeouts apply per worker.
+
+    Args:
+        config (dict): This worker's configuration
+        worker_id (str): Lease owner name, defaults to host:pid
+        stop (threading.Event): Set to make the worker exit after its current job
+        idle_seconds (float): How long to sleep when the queue is empty
+    """
+    # Imported here so the producer side does not pull in the scraper
+    from news_scraper import fetch_upsc_news, poll_upsc_news
+    
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    stop = stop or threading.Event()
+    queue = get_work_queue(config)
+    logger.info(f"Worker {worker_id} polling {queue.path}")
+    while not stop.is_set():
+        job = queue.lease(worker_id)
+        if job is None:
+            stop.wait(idle_seconds)
+            continue
+        source = job["source"]
+        try:
+            # No run cache, so a retried job really fetches again
+            job_config = dict(config, sources=[source], keywords=job["payload"].get("keywords", config['keywords']),
+                              news_cache_ttl_seconds=0)
+            validators = job["payload"].get("validators")
+            if validators is None:
+                news_items, report = fetch_upsc_news(job_config)
+            else:
+                news_items, report, validators = poll_upsc_news(job_config, validators)
+            timing = report.sources.get(source)
+            if timing is not None and timing.status == "error":
+                raise RuntimeError(timing.error)
+            result = {"items": news_items, "timing": timing.to_dict() if timing else None}
+            if validators is not None and timing is not None and timing.url in validators:
+                result["validators"] = {timing.url: validators[timing.url]}
+            stored = queue.complete(job["id"], worker_id, result)
+            if not stored:
+                logger.warning(f"Lease on {source} job {job['id']} was lost before completion")
+        except Exception as e:
+            logger.error(f"Worker {worker_id} failed {source} job {job['id']}: {e}")
+            queue.fail(job["id"], worker_id, e)
+    logger.info(f"Worker {worker_id} stopped")